@@ -1,4 +1,13 @@
 import common_util
+import operator
+import os
+from collections import namedtuple
+from collections.abc import MutableMapping
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # 1.1 unpacking a sequence into separate variables
@@ -134,6 +143,100 @@ def doctest_0102():
     pass
 
 
+# tag dispatch in batches
+#  - instead of if tag == 'foo' ... elif ... and one call per record
+#  - records are queued per tag, handler gets a list of args tuples
+#    once batch_size records of that tag are queued (and on flush)
+#  - per tag counters : records, batches, seconds spent in handler
+TagStats = namedtuple('TagStats', ['records', 'batches', 'seconds'])
+
+
+class BatchDispatcher:
+    """
+    >>> records = [('foo', 1, 2), ('bar', 'hello'), ('foo', 3, 4)]
+    >>> dispatcher = BatchDispatcher(batch_size=2)
+    >>> @dispatcher.register('foo')
+    ... def do_foo(batch):
+    ...     for x, y in batch:
+    ...         print('foo', x, y)
+    >>> dispatcher.register('bar', lambda batch: print('bar', batch))
+    >>> stats = dispatcher.dispatch(records)
+    foo 1 2
+    foo 3 4
+    bar [('hello',)]
+    >>> stats['foo'].records, stats['foo'].batches
+    (2, 1)
+    >>> dispatcher.feed(('spam',))
+    Traceback (most recent call last):
+      ...
+    KeyError: "no handler for tag 'spam'"
+
+    # re-register : records already queued go to the old handler
+    >>> dispatcher.feed(('bar', 'queued'))
+    >>> dispatcher.register('bar', lambda batch: print('new bar', batch))
+    bar [('queued',)]
+    >>> dispatcher.dispatch([('bar', 'later')])['bar'].records
+    new bar [('later',)]
+    3
+    """
+    def __init__(self, batch_size=1000):
+        import time
+        self.batch_size = batch_size
+        self._handlers = {}
+        self._pending = {}  # tag -> [args, ...]
+        self._stats = {}  # tag -> [records, batches, seconds]
+        self._clock = time.perf_counter
+
+    def register(self, tag, handler=None):
+        if handler is None:  # used as decorator
+            def decorate(func):
+                self.register(tag, func)
+                return func
+            return decorate
+        if tag in self._handlers:
+            # re-register : queued records go to the old handler first
+            self._flush_tag(tag)
+        self._handlers[tag] = handler
+        self._pending.setdefault(tag, [])
+        self._stats.setdefault(tag, [0, 0, 0.0])
+
+    def feed(self, record):
+        tag = record[0]
+        pending = self._pending.get(tag)
+        if pending is None:
+            raise KeyError('no handler for tag {!r}'.format(tag))
+        pending.append(record[1:])
+        if len(pending) >= self.batch_size:
+            self._flush_tag(tag)
+
+    def _flush_tag(self, tag):
+        batch = self._pending[tag]
+        if not batch:
+            return
+        self._pending[tag] = []
+        start = self._clock()
+        self._handlers[tag](batch)
+        stats = self._stats[tag]
+        stats[0] += len(batch)
+        stats[1] += 1
+        stats[2] += self._clock() - start
+
+    def flush(self):
+        for tag in self._pending:
+            self._flush_tag(tag)
+
+    def dispatch(self, records):
+        """feed all records, flush, return stats()"""
+        feed = self.feed
+        for record in records:
+            feed(record)
+        self.flush()
+        return self.stats()
+
+    def stats(self):
+        return {tag: TagStats(*s) for tag, s in self._stats.items()}
+
+
 # how to keep latest n items : use deque
 def doctest_0103():
     """
@@ -172,6 +275,157 @@ def doctest_0103():
     pass
 
 
+# rolling stats over the last n items (or last n seconds)
+#  - sum, mean, variance : updated on append / evict (welford)
+#  - min, max : monotonic deques
+#    - min deque keeps increasing values : a new value drops every
+#      larger one before it, they can never be the min again
+#    - front is the answer, popped when it leaves the window
+#  - all amortized O(1) per append instead of min(q), sum(q)
+class WindowStats:
+    """
+    >>> w = WindowStats(maxlen=3)
+    >>> for x in [1, 2, 3, 4, 5]:
+    ...     w.append(x)
+    >>> len(w), w.sum, w.mean, w.min, w.max
+    (3, 12, 4.0, 3, 5)
+    >>> w.variance, w.pvariance
+    (1.0, 0.6666666666666666)
+
+    # time based : values of the last 10 (clock) seconds
+    >>> t = WindowStats(maxage=10)
+    >>> t.append(5, ts=0)
+    >>> t.append(1, ts=4)
+    >>> t.append(3, ts=12)  # value from ts=0 expires
+    >>> t.min, t.max, t.sum
+    (1, 3, 4)
+    >>> t.expire(now=22)
+    >>> len(t), t.min
+    (0, None)
+
+    # a spike leaving the window doesn't wreck sum / variance
+    >>> s = WindowStats(maxlen=3)
+    >>> for x in [1e16, 0.5, 1.5, 2.5, 0.5]:
+    ...     s.append(x)
+    >>> s.sum, s.mean, s.variance
+    (4.5, 1.5, 1.0)
+    """
+    #  - sum, mean, m2 are updated incrementally, removal by subtraction
+    #    loses precision (cancellation) : recomputed from the window
+    #    every len(window) evictions, or at once when a removal cancels
+    #    out most of sum or m2 (a spike leaving)
+    #  - reads don't expire : after an idle period call expire() first
+    def __init__(self, maxlen=None, maxage=None, clock=None):
+        import time
+        from collections import deque
+        if maxlen is None and maxage is None:
+            raise ValueError('need maxlen or maxage')
+        self.maxlen = maxlen
+        self.maxage = maxage
+        self._clock = clock or time.monotonic
+        self._items = deque()  # (seq, ts, value)
+        self._mins = deque()  # (seq, value), values increasing
+        self._maxs = deque()  # (seq, value), values decreasing
+        self._seq = 0
+        self.sum = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._evicted = 0  # since last recompute
+
+    def __len__(self):
+        return len(self._items)
+
+    def append(self, value, ts=None):
+        if self.maxage is not None and ts is None:
+            ts = self._clock()
+        seq = self._seq
+        self._seq += 1
+        self._items.append((seq, ts, value))
+        self.sum += value
+        n = len(self._items)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+        mins, maxs = self._mins, self._maxs
+        while mins and value < mins[-1][1]:
+            mins.pop()
+        mins.append((seq, value))
+        while maxs and maxs[-1][1] < value:
+            maxs.pop()
+        maxs.append((seq, value))
+
+        if self.maxlen is not None and n > self.maxlen:
+            self._evict()
+        if self.maxage is not None:
+            self.expire(ts)
+
+    def expire(self, now=None):
+        """drop values older than maxage"""
+        if self.maxage is None:
+            return
+        if now is None:
+            now = self._clock()
+        items = self._items
+        while items and items[0][1] <= now - self.maxage:
+            self._evict()
+
+    def _evict(self):
+        seq, _, value = self._items.popleft()
+        n = len(self._items)
+        delta = value - self._mean
+        self._evicted += 1
+        if n == 0:
+            self.sum, self._mean, self._m2 = 0, 0.0, 0.0
+            self._evicted = 0
+        else:
+            total = self.sum - value
+            mean = self._mean - delta / n
+            m2 = self._m2 - delta * (value - mean)
+            # most significant bits cancelled out : spike left the window
+            lost = m2 < self._m2 * 1e-6 or \
+                isinstance(total, float) and abs(total) < abs(value) * 1e-6
+            if lost or self._evicted >= n:
+                self._recompute()
+            else:
+                self.sum, self._mean, self._m2 = total, mean, m2
+        if self._mins[0][0] == seq:
+            self._mins.popleft()
+        if self._maxs[0][0] == seq:
+            self._maxs.popleft()
+
+    def _recompute(self):
+        import math
+        values = [value for _, _, value in self._items]
+        self.sum = sum(values)
+        self._mean = math.fsum(values) / len(values)
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in values)
+        self._evicted = 0
+
+    @property
+    def mean(self):
+        return self._mean if self._items else None
+
+    @property
+    def variance(self):
+        """sample variance like statistics.variance"""
+        n = len(self._items)
+        return self._m2 / (n - 1) if n > 1 else None
+
+    @property
+    def pvariance(self):
+        n = len(self._items)
+        return self._m2 / n if n else None
+
+    @property
+    def min(self):
+        return self._mins[0][1] if self._mins else None
+
+    @property
+    def max(self):
+        return self._maxs[0][1] if self._maxs else None
+
+
 # find largest or smallest n items
 def doctest_0104():
     """
@@ -217,22 +471,262 @@ def doctest_0104():
     """
 
 
+# streaming nlargest / nsmallest
+#  - keeps only k items in a heap : O(log k) per item
+#  - the heap root is the worst kept item, replaced by better ones
+#  - partial results from workers merge w/ + (picklable if key is)
+class _Reversed:
+    __slots__ = ('val',)
+
+    def __init__(self, val):
+        self.val = val
+
+    def __lt__(self, other):
+        return other.val < self.val
+
+    def __eq__(self, other):
+        return self.val == other.val
+
+
+class TopK:
+    """
+    >>> nums = [1, 0, 2, 23, 7, -4, 18, 23, 42, 37, 2]
+    >>> top = TopK(3)
+    >>> top.update(nums)
+    >>> top.result()  # same as heapq.nlargest(3, nums)
+    [42, 37, 23]
+    >>> low = TopK(3, largest=False)
+    >>> low.update(nums)
+    >>> low.result()
+    [-4, 0, 1]
+
+    # merge partial results, e.g. from worker processes
+    >>> a, b = TopK(3), TopK(3)
+    >>> a.update(nums[:5])
+    >>> b.update(nums[5:])
+    >>> (a + b).result()
+    [42, 37, 23]
+
+    # w/ key
+    >>> from operator import itemgetter
+    >>> top = TopK(2, key=itemgetter('value'))
+    >>> top.update([{'name': 'aaa', 'value': 91.1},
+    ...             {'name': 'bbb', 'value': 543.22},
+    ...             {'name': 'ccc', 'value': 23.9}])
+    >>> top.result()
+    [{'name': 'bbb', 'value': 543.22}, {'name': 'aaa', 'value': 91.1}]
+    """
+    def __init__(self, k, key=None, largest=True):
+        self.k = k
+        self.key = key
+        self.largest = largest
+        # entries : (sort key, -seq, item), root = worst kept item
+        #  - -seq : on ties the earlier item wins like heapq.nlargest
+        self._heap = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, item):
+        import heapq
+        val = item if self.key is None else self.key(item)
+        if not self.largest:
+            val = _Reversed(val)
+        entry = (val, -self._seq, item)
+        self._seq += 1
+        heap = self._heap
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif heap and heap[0] < entry:
+            heapq.heapreplace(heap, entry)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def result(self):
+        """best first, like heapq.nlargest / nsmallest"""
+        return [entry[-1] for entry in sorted(self._heap, reverse=True)]
+
+    def __add__(self, other):
+        if self.largest != other.largest:
+            raise ValueError('can not merge largest and smallest TopK')
+        merged = TopK(max(self.k, other.k), self.key, self.largest)
+        merged.update(self.result())
+        merged.update(other.result())
+        return merged
+
+
 # priority queue : using heap
 def doctest_0105():
-    import heapq
+    """
+    # highest priority first, same priority in push order
+    >>> q = PriorityQueue()
+    >>> q.push('foo', 1)
+    >>> q.push('bar', 5)
+    >>> q.push('spam', 4)
+    >>> q.push('grok', 1)
+    >>> len(q), q.peek()
+    (4, 'bar')
+    >>> q.pop()
+    'bar'
+
+    # change priority or drop items w/o rebuilding the heap
+    >>> q.update_priority('grok', 10)
+    >>> q.remove('spam')
+    >>> [q.pop() for _ in range(len(q))]
+    ['grok', 'foo']
+
+    # bulk load : one heapify instead of n pushes
+    >>> q.extend([('a', 2), ('b', 3), ('c', 1)])
+    >>> q.pop(), q.pop(), q.pop()
+    ('b', 'a', 'c')
+    >>> q.pop()
+    Traceback (most recent call last):
+      ...
+    IndexError: pop from an empty priority queue
+    """
 
-    class PriorityQueue:
-        def __init__(self):
-            self._queue = []
-            self._index = 0
 
-        def push(self, item, priority):
-            heapq.heappush(self._queue, (-priority, self._index, item))
-            self._index += 1
+class PriorityQueue:
+    """heapq based priority queue
 
-        def pop(self):
-            return heapq.heappop(self._queue)[-1]
-    pass
+    items must be hashable : entry map for update_priority / remove
+    removed entries stay in the heap as tombstones (lazy deletion)
+    and get skipped on pop, heap is compacted when half of it is dead
+    pushing an already queued item updates its priority
+    """
+    _REMOVED = object()  # tombstone marker
+
+    def __init__(self):
+        self._queue = []
+        self._entries = {}  # item -> [-priority, index, item]
+        self._index = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def _new_entry(self, item, priority):
+        if item in self._entries:
+            self._kill(item)
+        entry = [-priority, self._index, item]
+        self._index += 1
+        self._entries[item] = entry
+        return entry
+
+    def _kill(self, item):
+        entry = self._entries.pop(item)
+        entry[-1] = self._REMOVED
+        if len(self._queue) > 2 * len(self._entries) + 64:
+            self._compact()
+
+    def _compact(self):
+        import heapq
+        self._queue = [e for e in self._queue if e[-1] is not self._REMOVED]
+        heapq.heapify(self._queue)
+
+    def push(self, item, priority):
+        import heapq
+        entry = self._new_entry(item, priority)  # may compact _queue
+        heapq.heappush(self._queue, entry)
+
+    def extend(self, pairs):
+        """push (item, priority) pairs at once"""
+        import heapq
+        new = [self._new_entry(item, priority) for item, priority in pairs]
+        # k pushes cost k*log(n), heapify costs n + k
+        if len(new) * 4 > len(self._queue):
+            self._queue.extend(new)
+            heapq.heapify(self._queue)
+        else:
+            for entry in new:
+                heapq.heappush(self._queue, entry)
+
+    def update_priority(self, item, priority):
+        if item not in self._entries:
+            raise KeyError(item)
+        self.push(item, priority)
+
+    def remove(self, item):
+        self._kill(item)  # KeyError if not queued
+
+    def _top(self, what):
+        import heapq
+        queue = self._queue
+        while queue and queue[0][-1] is self._REMOVED:
+            heapq.heappop(queue)
+        if not queue:
+            raise IndexError('{} from an empty priority queue'.format(what))
+        return queue[0]
+
+    def peek(self):
+        return self._top('peek')[-1]
+
+    def pop(self):
+        import heapq
+        self._top('pop')
+        item = heapq.heappop(self._queue)[-1]
+        del self._entries[item]
+        return item
+
+
+class SyncPriorityQueue(PriorityQueue):
+    """PriorityQueue guarded by a lock for multi-threaded schedulers
+
+    get() blocks until an item is available (or timeout)
+
+    >>> q = SyncPriorityQueue()
+    >>> q.push('job', 1)
+    >>> q.get(timeout=0.1)
+    'job'
+    >>> q.get(timeout=0.01) is None
+    True
+    """
+    def __init__(self):
+        import threading
+        super().__init__()
+        self._lock = threading.Condition()
+
+    def __len__(self):
+        with self._lock:
+            return super().__len__()
+
+    def push(self, item, priority):
+        with self._lock:
+            super().push(item, priority)
+            self._lock.notify()
+
+    def extend(self, pairs):
+        with self._lock:
+            super().extend(pairs)
+            self._lock.notify_all()
+
+    def update_priority(self, item, priority):
+        with self._lock:
+            super().update_priority(item, priority)
+
+    def remove(self, item):
+        with self._lock:
+            super().remove(item)
+
+    def peek(self):
+        with self._lock:
+            return super().peek()
+
+    def pop(self):
+        with self._lock:
+            return super().pop()
+
+    def get(self, timeout=None):
+        """blocking pop, None on timeout"""
+        with self._lock:
+            if not self._lock.wait_for(self._entries.__len__, timeout):
+                return None
+            return super().pop()
 
 
 # keep dictionries in order
@@ -257,6 +751,254 @@ def doctest_0107():
     """
 
 
+# OrderedDict as LRU cache
+#  - hit : move_to_end(key), order is least -> most recently used
+#  - over limit : popitem(last=False) drops the least recently used
+#  - limits : entry count, total bytes (sizeof per value), ttl seconds
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions',
+                                     'expirations', 'currsize', 'bytes'])
+
+
+class LRUCache:
+    """
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache['foo'] = 1
+    >>> cache['bar'] = 2
+    >>> cache['foo']  # foo is now most recently used
+    1
+    >>> cache['spam'] = 3  # evicts bar
+    >>> list(cache), cache.get('bar')
+    (['foo', 'spam'], None)
+    >>> cache.info()
+    CacheInfo(hits=1, misses=1, evictions=1, expirations=0, currsize=2, bytes=0)
+
+    # byte size limit and ttl w/ a fake clock
+    >>> now = [0]
+    >>> cache = LRUCache(maxsize=None, maxbytes=10, ttl=5,
+    ...                  sizeof=len, clock=lambda: now[0])
+    >>> cache['a'] = 'xxxxxx'
+    >>> cache['b'] = 'yyyyyy'  # 12 bytes > 10 : a is evicted
+    >>> list(cache), cache.info().bytes
+    (['b'], 6)
+    >>> now[0] = 6
+    >>> 'b' in cache, cache.info().expirations
+    (False, 1)
+    """
+    def __init__(self, maxsize=128, maxbytes=None, ttl=None, sizeof=None,
+                 clock=None):
+        import sys
+        import time
+        from collections import OrderedDict
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self._sizeof = sizeof or sys.getsizeof
+        self._clock = clock or time.monotonic
+        self._data = OrderedDict()  # key -> (value, size, expires at)
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is not None and self.ttl is not None and \
+                entry[2] <= self._clock():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def get(self, key, default=None):
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def __getitem__(self, key):
+        value = self.get(key, _missing)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        if key in data:
+            self._drop(key)
+        size = self._sizeof(value) if self.maxbytes is not None else 0
+        expires = self._clock() + self.ttl if self.ttl is not None else None
+        data[key] = (value, size, expires)
+        self._bytes += size
+        while data and (
+                self.maxsize is not None and len(data) > self.maxsize or
+                self.maxbytes is not None and self._bytes > self.maxbytes):
+            _, (_, size, _) = data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def __delitem__(self, key):
+        self._drop(key)
+
+    def _drop(self, key):
+        self._bytes -= self._data.pop(key)[1]
+
+    def clear(self):
+        # resets the counters too, like functools.lru_cache.cache_clear
+        self._data.clear()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.expirations, len(self._data), self._bytes)
+
+
+_fast_types = {int, str}
+
+
+def _make_key(args, kwargs):
+    if kwargs:
+        return args + (_missing,) + tuple(sorted(kwargs.items()))
+    # unwrap only exact int/str : f((1, 2)) must not hit f(1, 2)
+    if len(args) == 1 and type(args[0]) in _fast_types:
+        return args[0]
+    return args
+
+
+def cached(maxsize=128, maxbytes=None, ttl=None, sizeof=None):
+    """LRUCache as a decorator, args must be hashable
+
+    >>> @cached(maxsize=2)
+    ... def square(x):
+    ...     return x * x
+    >>> square(3), square(3), square(4)
+    (9, 9, 16)
+    >>> square.cache_info()
+    CacheInfo(hits=1, misses=2, evictions=0, expirations=0, currsize=2, bytes=0)
+    >>> square.cache_clear()
+    >>> square.cache_info()
+    CacheInfo(hits=0, misses=0, evictions=0, expirations=0, currsize=0, bytes=0)
+
+    >>> @cached()
+    ... def pair(*args):
+    ...     return args
+    >>> pair(1, 2), pair((1, 2))
+    ((1, 2), ((1, 2),))
+    """
+    from functools import wraps
+
+    def decorate(func):
+        cache = LRUCache(maxsize, maxbytes, ttl, sizeof)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            value = cache.get(key, _missing)
+            if value is _missing:
+                value = cache[key] = func(*args, **kwargs)
+            return value
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorate
+
+
+def bench_0107(n=10**6, maxsize=1024):
+    # skewed key stream, mostly hits
+    import functools
+    import random
+    import time
+    rnd = random.Random(0)
+    keys = [int(rnd.paretovariate(0.8)) for _ in range(n)]
+
+    def square(x):
+        return x * x
+
+    for name, deco in (('functools.lru_cache',
+                        functools.lru_cache(maxsize=maxsize)),
+                       ('cached', cached(maxsize=maxsize)),
+                       ('cached+ttl', cached(maxsize=maxsize, ttl=60))):
+        func = deco(square)
+        start = time.perf_counter()
+        for k in keys:
+            func(k)
+        secs = time.perf_counter() - start
+        print('{:20s} {:>10.0f} calls/s  {}'.format(
+            name, n / secs, func.cache_info()))
+
+
+# JSON Lines : one json object per line
+#  - write : encode records from a generator, one write per batch
+#            dict key order is kept (like json.dumps of OrderedDict)
+#  - read : lazy, line by line
+#    - fields : keep only those top-level keys
+#               (C decoder + drop is faster than skipping in python)
+def write_jsonl(records, f, batch_size=1000, **dumps_kwargs):
+    """returns number of records written
+
+    >>> import io
+    >>> from collections import OrderedDict
+    >>> f = io.StringIO()
+    >>> write_jsonl([OrderedDict([('foo', 1), ('bar', 2)]),
+    ...              {'spam': [3, 4], 'grok': {'a': 'b'}}], f)
+    2
+    >>> print(f.getvalue(), end='')
+    {"foo": 1, "bar": 2}
+    {"spam": [3, 4], "grok": {"a": "b"}}
+    """
+    import json
+    encode = json.JSONEncoder(**dumps_kwargs).encode
+    batch = []
+    count = 0
+    for rec in records:
+        batch.append(encode(rec))
+        if len(batch) >= batch_size:
+            f.write('\n'.join(batch) + '\n')
+            count += len(batch)
+            batch = []
+    if batch:
+        f.write('\n'.join(batch) + '\n')
+        count += len(batch)
+    return count
+
+
+def read_jsonl(f, fields=None, **loads_kwargs):
+    """lazy reader for text or binary line iterables
+
+    >>> lines = ['{"foo": 1, "bar": {"x": [1, "]"]}, "spam": "a,b"}\\n',
+    ...          '\\n',
+    ...          '{"spam": "c", "foo": 2}\\n']
+    >>> list(read_jsonl(lines))
+    [{'foo': 1, 'bar': {'x': [1, ']']}, 'spam': 'a,b'}, {'spam': 'c', 'foo': 2}]
+    >>> list(read_jsonl(lines, fields=['foo', 'spam']))
+    [{'foo': 1, 'spam': 'a,b'}, {'spam': 'c', 'foo': 2}]
+    """
+    import json
+    decoder = json.JSONDecoder(**loads_kwargs)
+    if fields is not None:
+        fields = frozenset(fields)
+    for line in f:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        rec = decoder.decode(line)
+        if fields is not None:
+            rec = type(rec)((k, v) for k, v in rec.items() if k in fields)
+        yield rec
+
+
 # calc on dict
 #  - min, max
 def doctest_0108():
@@ -299,6 +1041,99 @@ def doctest_0108():
     """
 
 
+# min, max, sum ... of dict values in one pass
+#  - no zip : one walk over items(), no (value, key) tuple per item
+#    (items() iterator reuses its tuple when unpacked right away)
+#  - top n : heap entries are made only for values entering the heap
+#  - all values float and numpy installed : vectorized path
+Summary = namedtuple('Summary', ['count', 'sum', 'min', 'argmin',
+                                 'max', 'argmax', 'top'])
+
+
+def summarize(mapping, top=None):
+    """
+    >>> data = {
+    ...     'aaa': 45.23,
+    ...     'bbb': 612.78,
+    ...     'ccc': 205.55,
+    ...     'ddd': 37.28,
+    ...     'eee': 10.75,
+    ... }
+    >>> s = summarize(data, top=2)
+    >>> s.min, s.argmin, s.max, s.argmax
+    (10.75, 'eee', 612.78, 'bbb')
+    >>> s.count, round(s.sum, 2), s.top
+    (5, 911.59, [('bbb', 612.78), ('ccc', 205.55)])
+    >>> summarize({})
+    Summary(count=0, sum=0, min=None, argmin=None, max=None, argmax=None, top=None)
+    >>> summarize({1: 5.0, 'x': 5.0, 'y': 1.0}, top=2).top  # ties : first
+    [(1, 5.0), ('x', 5.0)]
+
+    # same results w/ or w/o numpy : only all-float values are vectorized
+    >>> big = dict.fromkeys(range(2000), 1.5)
+    >>> big[7] = big[1500] = 2.5
+    >>> summarize(big, top=4).top
+    [(7, 2.5), (1500, 2.5), (0, 1.5), (1, 1.5)]
+    >>> big['int'] = 10**20 + 1
+    >>> summarize(big).max
+    100000000000000000001
+    >>> big['str'] = '5'
+    >>> summarize(big)
+    Traceback (most recent call last):
+      ...
+    TypeError: unsupported operand type(s) for +=: 'float' and 'str'
+    """
+    import heapq
+    n = len(mapping)
+    if n == 0:
+        return Summary(0, 0, None, None, None, None, [] if top else None)
+    if np is not None and n >= 1000:
+        values = list(mapping.values())
+        # every value exactly float : ints / str must not be converted
+        if set(map(type, values)) == {float}:
+            return _summarize_numpy(mapping, values, top)
+
+    it = iter(mapping.items())
+    k, v = next(it)
+    total = mn = mx = v
+    argmin = argmax = k
+    # (value, -seq, key) : ties never compare keys, first seen wins
+    heap = [(v, 0, k)] if top else None
+    for seq, (k, v) in enumerate(it, 1):
+        total += v
+        if v < mn:
+            mn, argmin = v, k
+        elif mx < v:
+            mx, argmax = v, k
+        if heap is not None:
+            if len(heap) < top:
+                heapq.heappush(heap, (v, -seq, k))
+            elif heap[0][0] < v:
+                heapq.heapreplace(heap, (v, -seq, k))
+    if heap is not None:
+        heap = [(k, v) for v, _, k in sorted(heap, reverse=True)]
+    return Summary(n, total, mn, argmin, mx, argmax, heap)
+
+
+def _summarize_numpy(mapping, values, top):
+    n = len(mapping)
+    values = np.array(values, dtype=float)
+    keys = list(mapping)
+    imin, imax = int(values.argmin()), int(values.argmax())
+    best = None
+    if top:
+        # ties at the cut : first seen wins, like the heap path
+        top = min(top, n)
+        cut = -np.partition(-values, top - 1)[top - 1]
+        above = np.flatnonzero(values > cut)
+        tied = np.flatnonzero(values == cut)[:top - len(above)]
+        idx = np.sort(np.concatenate([above, tied]))
+        idx = idx[np.argsort(-values[idx], kind='stable')]
+        best = [(keys[i], values[i].item()) for i in idx]
+    return Summary(n, values.sum().item(), values[imin].item(), keys[imin],
+                   values[imax].item(), keys[imax], best)
+
+
 # find commonalities in 2 dicts
 def doctest_0109():
     """
@@ -333,6 +1168,156 @@ def doctest_0109():
     """
 
 
+# set operations w/o temporary sets
+#  - dicts : walk the smallest one, probe the others (hash lookups)
+#  - sorted streams : merge style walk, O(1) memory
+#  - join : merge join on sorted input, hash join otherwise
+_missing = object()
+
+
+def common_keys(*mappings):
+    """like a.keys() & b.keys() & ... but lazy, in smallest dict's order
+
+    >>> a = {'x': 1, 'y': 2, 'z': 3}
+    >>> b = {'w': 10, 'x': 11, 'y': 2}
+    >>> c = {'y': 2}
+    >>> list(common_keys(a, b))
+    ['x', 'y']
+    >>> list(common_items(a, b, c))
+    [('y', 2)]
+    >>> list(key_difference(a, b))
+    ['z']
+    """
+    smallest = min(mappings, key=len)
+    others = [m for m in mappings if m is not smallest]
+    for k in smallest:
+        if all(k in m for m in others):
+            yield k
+
+
+def common_items(*mappings):
+    """like a.items() & b.items(), values needn't be hashable"""
+    smallest = min(mappings, key=len)
+    others = [m for m in mappings if m is not smallest]
+    for k, v in smallest.items():
+        if all(m.get(k, _missing) == v for m in others):
+            yield k, v
+
+
+def key_difference(a, *others):
+    """like a.keys() - b.keys() - ..."""
+    for k in a:
+        if not any(k in m for m in others):
+            yield k
+
+
+def sorted_intersect(*iterables):
+    """N-way intersection of sorted iterables, distinct values
+
+    >>> list(sorted_intersect([1, 2, 2, 4, 7, 9], iter([2, 3, 4, 9]),
+    ...                       range(0, 10, 2)))
+    [2, 4]
+    """
+    iters = [iter(it) for it in iterables]
+    try:
+        heads = [next(it) for it in iters]
+        while True:
+            target = max(heads)
+            for i, it in enumerate(iters):
+                while heads[i] < target:
+                    heads[i] = next(it)
+            if all(not target < h for h in heads):  # all equal
+                yield target
+                for i, it in enumerate(iters):
+                    while not target < heads[i]:  # skip dups
+                        heads[i] = next(it)
+    except StopIteration:  # one input ran out
+        return
+
+
+def sorted_difference(a, b):
+    """values of sorted a not in sorted b
+
+    >>> list(sorted_difference([1, 2, 4, 5, 8], [2, 3, 8]))
+    [1, 4, 5]
+    """
+    b = iter(b)
+    head = next(b, _missing)
+    for x in a:
+        while head is not _missing and head < x:
+            head = next(b, _missing)
+        if head is _missing or x < head:
+            yield x
+
+
+def intersect(*iterables, presorted=False):
+    """intersection of key streams
+
+    presorted : merge walk, nothing materialized
+    otherwise : only the first input becomes a set, it shrinks while
+                the others stream through it
+
+    >>> sorted(intersect(['y', 'x', 'z'], iter(['w', 'x', 'y']), ['y']))
+    ['y']
+    """
+    if presorted:
+        yield from sorted_intersect(*iterables)
+        return
+    first, *rest = iterables
+    found = set(first)
+    for it in rest:
+        found = {x for x in it if x in found}
+    yield from found
+
+
+def join(left, right, left_key, right_key=None, presorted=False):
+    """inner join : yields (left row, right row) pairs
+
+    presorted : both sides sorted by key -> merge join, only one group
+                of equal right keys is kept in memory
+    otherwise : hash join, right side is loaded into a dict
+
+    >>> from operator import itemgetter
+    >>> users = [{'uid': 1, 'name': 'aaa'}, {'uid': 2, 'name': 'bbb'}]
+    >>> logins = [{'uid': 1, 'at': 10}, {'uid': 1, 'at': 12},
+    ...           {'uid': 3, 'at': 11}]
+    >>> [(u['name'], l['at']) for u, l in join(users, logins,
+    ...                                         itemgetter('uid'))]
+    [('aaa', 10), ('aaa', 12)]
+    >>> [(u['name'], l['at']) for u, l in join(users, logins,
+    ...                                         itemgetter('uid'),
+    ...                                         presorted=True)]
+    [('aaa', 10), ('aaa', 12)]
+    """
+    from collections import defaultdict
+    from itertools import groupby
+    right_key = right_key or left_key
+    if not presorted:
+        table = defaultdict(list)
+        for r in right:
+            table[right_key(r)].append(r)
+        for lrow in left:
+            for r in table.get(left_key(lrow), ()):
+                yield lrow, r
+        return
+
+    groups = groupby(right, key=right_key)
+    rk, rgroup = next(groups, (_missing, None))
+    rows = None
+    for lrow in left:
+        lk = left_key(lrow)
+        while rk is not _missing and rk < lk:
+            rk, rgroup = next(groups, (_missing, None))
+            rows = None
+        if rk is _missing:
+            return
+        if rk == lk:
+            if rows is None:  # group is reused by following left rows
+                rows = list(rgroup)
+            for r in rows:
+                yield lrow, r
+
+
 # remove duplicates from seqeuence
 def doctest_0110():
     """
@@ -406,6 +1391,440 @@ def remove_dict_dup(items, key=None):
             seen.add(val)
 
 
+# bounded memory dedup
+#  - remove_dup's seen set grows w/ every distinct item
+#  - 'lru' : exact within last maxsize distinct keys (OrderedDict window)
+#            dups farther apart than the window pass through again
+#  - 'bloom' : fixed size bit array, never yields a dup
+#              but drops ~error_rate of unique items (false positive)
+class BloomFilter:
+    """
+    >>> bf = BloomFilter(capacity=1000, error_rate=0.01)
+    >>> bf.add('aaa')
+    False
+    >>> bf.add('aaa')  # returns True if (probably) seen before
+    True
+    >>> 'aaa' in bf, 'bbb' in bf
+    (True, False)
+    >>> bf.num_bits, bf.num_hashes
+    (9586, 7)
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        import math
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be in (0, 1)')
+        # m = -n ln(p) / ln(2)^2, k = m/n ln(2)
+        m = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.num_bits = max(8, int(math.ceil(m)))
+        self.num_hashes = max(1, int(round(m / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, val):
+        # double hashing : h1 + i * h2
+        h1 = hash(val)
+        h2 = hash((h1, val)) | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, val):
+        bits = self._bits
+        seen = True
+        for pos in self._positions(val):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                seen = False
+                bits[byte] |= mask
+        return seen
+
+    def __contains__(self, val):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7))
+                   for pos in self._positions(val))
+
+
+def remove_dup_bounded(items, key=None, mode='lru', maxsize=100000,
+                       capacity=10**7, error_rate=0.001):
+    """remove_dict_dup w/ capped memory
+
+    >>> a = [1, 5, 2, 1, 9, 1, 5, 10]
+    >>> list(remove_dup_bounded(a))
+    [1, 5, 2, 9, 10]
+    >>> list(remove_dup_bounded(a, maxsize=2))  # 1 fell out of the window
+    [1, 5, 2, 1, 9, 5, 10]
+    >>> list(remove_dup_bounded(a, mode='bloom', capacity=100))
+    [1, 5, 2, 9, 10]
+    >>> rows = [{'x': 1, 'y': 2}, {'x': 1, 'y': 3}, {'x': 2, 'y': 4}]
+    >>> list(remove_dup_bounded(rows, key=lambda d: d['x']))
+    [{'x': 1, 'y': 2}, {'x': 2, 'y': 4}]
+    """
+    if mode == 'lru':
+        from collections import OrderedDict
+        window = OrderedDict()
+        for item in items:
+            val = item if key is None else key(item)
+            if val in window:
+                window.move_to_end(val)
+                continue
+            yield item
+            window[val] = None
+            if len(window) > maxsize:
+                window.popitem(last=False)
+    elif mode == 'bloom':
+        seen = BloomFilter(capacity, error_rate)
+        for item in items:
+            val = item if key is None else key(item)
+            if not seen.add(val):
+                yield item
+    else:
+        raise ValueError('unknown mode: {!r}'.format(mode))
+
+
+def _bench_dedup(name, n, dup_ratio):
+    import random
+    rnd = random.Random(0)
+    distinct = max(1, int(n * (1 - dup_ratio)))
+    data = ('line-{}\n'.format(rnd.randrange(distinct)) for _ in range(n))
+    if name == 'set':
+        it = remove_dup(data)
+    elif name == 'lru':
+        it = remove_dup_bounded(data, maxsize=distinct // 10)
+    else:
+        it = remove_dup_bounded(data, mode='bloom', capacity=distinct)
+    return sum(1 for _ in it)
+
+
+def bench_0110(n=10**6, dup_ratio=0.5):
+    # peak rss growth n items/sec : each run in its own process
+    for name in ('set', 'lru', 'bloom'):
+        out, secs, rss = common_util.measure_in_child(
+            _bench_dedup, name, n, dup_ratio)
+        print('{:6s} out={:>9d} {:>12.0f} items/s  peak rss +{} KB'.format(
+            name, out, n / secs, rss))
+
+
+# exact dedup larger than memory : spill to disk
+#  - dedup in memory until seen keys reach memory_budget bytes
+#  - then hash partition keys into bucket files
+#    - already yielded keys go to buckets as markers
+#    - dedup each bucket in memory, re-partition buckets still too big
+#  - keep_order : per bucket survivors are in input order,
+#                 heapq.merge them back by sequence number,
+#                 at most nbuckets runs at a time (open file limit)
+_KEY_OVERHEAD = 100  # approx. set slot + object header per key
+
+
+def _pickle_records(path):
+    import pickle
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _partition(records, dirname, prefix, nbuckets, salt):
+    import pickle
+    paths = [os.path.join(dirname, '{}-{}'.format(prefix, i))
+             for i in range(nbuckets)]
+    files = [open(p, 'wb') for p in paths]
+    try:
+        for rec in records:
+            # rec : (seq, key, item), seq is None for markers
+            h = hash(rec[1]) if salt is None else hash((salt, rec[1]))
+            pickle.dump(rec, files[h % nbuckets], pickle.HIGHEST_PROTOCOL)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _dedup_bucket(path, dirname, memory_budget, nbuckets, depth):
+    # yields one generator per leaf bucket, each in input order
+    if os.path.getsize(path) > memory_budget and depth < 4:
+        # still too big : split again w/ different hash
+        subpaths = _partition(_pickle_records(path), dirname,
+                              os.path.basename(path), nbuckets, depth)
+        os.remove(path)
+        for sub in subpaths:
+            yield from _dedup_bucket(sub, dirname, memory_budget,
+                                     nbuckets, depth + 1)
+    else:
+        yield _dedup_leaf(path)
+
+
+def _dedup_leaf(path):
+    seen = set()
+    for seq, val, item in _pickle_records(path):
+        if val not in seen:
+            seen.add(val)
+            if seq is not None:
+                yield seq, item
+    os.remove(path)
+
+
+def _sorted_run(records, dirname, name):
+    # write (seq, item) already in seq order, returns the path
+    import pickle
+    path = os.path.join(dirname, name)
+    with open(path, 'wb') as f:
+        for rec in records:
+            pickle.dump(rec, f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _merge_runs(paths, dirname, fanin):
+    # merge at most fanin runs at a time : bounded number of open files
+    import heapq
+    from operator import itemgetter
+    level = 0
+    while len(paths) > fanin:
+        merged = []
+        for i in range(0, len(paths), fanin):
+            group = paths[i:i + fanin]
+            merged.append(_sorted_run(
+                heapq.merge(*map(_pickle_records, group), key=itemgetter(0)),
+                dirname, 'merge-{}-{}'.format(level, len(merged))))
+            for p in group:
+                os.remove(p)
+        paths = merged
+        level += 1
+    return heapq.merge(*map(_pickle_records, paths), key=itemgetter(0))
+
+
+def remove_dup_external(items, key=None, memory_budget=64 * 2**20,
+                        keep_order=False, nbuckets=64, tmpdir=None):
+    """exact remove_dict_dup w/ seen keys spilled to disk
+
+    keys and items must be picklable
+
+    >>> a = [1, 5, 2, 1, 9, 1, 5, 10] * 3 + [11, 2, 12]
+    >>> list(remove_dup_external(a, memory_budget=300, nbuckets=4,
+    ...                          keep_order=True))
+    [1, 5, 2, 9, 10, 11, 12]
+    >>> sorted(remove_dup_external(a, memory_budget=300, nbuckets=4))
+    [1, 2, 5, 9, 10, 11, 12]
+    >>> rows = [{'x': 1, 'y': 2}, {'x': 1, 'y': 3}, {'x': 2, 'y': 4}]
+    >>> list(remove_dup_external(rows, key=lambda d: d['x']))
+    [{'x': 1, 'y': 2}, {'x': 2, 'y': 4}]
+    """
+    import sys
+    import tempfile
+    from itertools import count
+
+    items = iter(items)
+    seen = set()
+    used = 0
+    for item in items:
+        val = item if key is None else key(item)
+        if val not in seen:
+            yield item
+            seen.add(val)
+            used += sys.getsizeof(val) + _KEY_OVERHEAD
+            if used > memory_budget:
+                break
+    else:
+        return  # fits in memory : same as remove_dict_dup
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as dirname:
+        def records(seen):
+            for val in seen:
+                yield None, val, None
+            seq = count()
+            for item in items:
+                yield next(seq), item if key is None else key(item), item
+        paths = _partition(records(seen), dirname, 'b', nbuckets, None)
+        seen = None  # release before reading buckets
+
+        buckets = (leaf for p in paths
+                   for leaf in _dedup_bucket(p, dirname, memory_budget,
+                                             nbuckets, 0))
+        if keep_order:
+            runs = [_sorted_run(b, dirname, 'run-{}'.format(i))
+                    for i, b in enumerate(buckets)]
+            buckets = [_merge_runs(runs, dirname, max(2, nbuckets))]
+        for bucket in buckets:
+            for _, item in bucket:
+                yield item
+
+
+# multi-process dedup of a line oriented file
+#  - parent only hands out byte ranges and temp file names :
+#    line payloads never pass through it (no pickling of items)
+#  - map : each worker reads its own byte range, computes keys and
+#          writes (offset, 16 byte blake2b digest) records per shard
+#  - probe : one task per shard owns that part of key space,
+#            reads its records in file order, so first occurrence wins
+#  - write : each worker copies the kept lines of its range to a file
+#  - keys are compared by digest : 128 bit, collisions negligible
+#  - key must be picklable : itemgetter or module level function
+def _stable_bytes(val):
+    # hash() is randomized per process : digest a type tagged encoding
+    if isinstance(val, str):
+        return b's' + val.encode('utf-8', 'surrogatepass')
+    if isinstance(val, (bytes, bytearray)):
+        return b'b' + bytes(val)
+    if val is None:
+        return b'z'
+    if isinstance(val, (int, float)):
+        # 1 == 1.0 == True in a set : same encoding
+        if isinstance(val, bool) or (isinstance(val, float) and
+                                     val.is_integer()):
+            val = int(val)
+        return b'n' + repr(val).encode()
+    if isinstance(val, tuple):
+        parts = [_stable_bytes(v) for v in val]
+        return b't' + b''.join(len(p).to_bytes(8, 'little') + p
+                               for p in parts)
+    raise TypeError('unsupported key type: {}'.format(type(val).__name__))
+
+
+def _split_records(path, start, end, key, encoding, nshards, dirname,
+                   split):
+    # shard file : offsets as array('q'), then the 16 byte digests
+    from array import array
+    from hashlib import blake2b
+    offsets = [array('q') for _ in range(nshards)]
+    digests = [[] for _ in range(nshards)]
+    seen = set()
+    with open(path, 'rb') as f:
+        pos = start
+        if start:  # line starting before start belongs to previous split
+            f.seek(start - 1)
+            pos += len(f.readline()) - 1
+        for line in f:
+            if pos >= end:
+                break
+            if key is None:
+                digest = blake2b(line, digest_size=16).digest()
+            else:
+                digest = blake2b(_stable_bytes(key(line.decode(encoding))),
+                                 digest_size=16).digest()
+            if digest not in seen:
+                seen.add(digest)
+                shard = (digest[0] << 8 | digest[1]) % nshards
+                offsets[shard].append(pos)
+                digests[shard].append(digest)
+            pos += len(line)
+    for i in range(nshards):
+        with open(os.path.join(dirname, 'm-{}-{}'.format(split, i)),
+                  'wb') as f:
+            offsets[i].tofile(f)
+            f.write(b''.join(digests[i]))
+
+
+def _shard_owner(dirname, shard, nsplits):
+    from array import array
+    seen = set()
+    for split in range(nsplits):
+        with open(os.path.join(dirname, 'm-{}-{}'.format(split, shard)),
+                  'rb') as f:
+            data = f.read()
+        count = len(data) // 24  # 8 byte offset + 16 byte digest
+        offsets = array('q', data[:8 * count])
+        kept = array('q')
+        for i, off in enumerate(offsets):
+            digest = data[8 * count + 16 * i:8 * count + 16 * i + 16]
+            if digest not in seen:
+                seen.add(digest)
+                kept.append(off)
+        with open(os.path.join(dirname, 'k-{}-{}'.format(split, shard)),
+                  'wb') as f:
+            kept.tofile(f)
+
+
+def _write_split(path, dirname, split, nshards, keep_order):
+    import mmap
+    from array import array
+    offsets = array('q')
+    for shard in range(nshards):
+        name = os.path.join(dirname, 'k-{}-{}'.format(split, shard))
+        with open(name, 'rb') as f:
+            offsets.frombytes(f.read())
+    if keep_order:
+        offsets = sorted(offsets)
+    out = os.path.join(dirname, 'out-{}'.format(split))
+    with open(path, 'rb') as f, open(out, 'wb') as fout:
+        if offsets:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for off in offsets:
+                    end = mm.find(b'\n', off) + 1 or len(mm)
+                    fout.write(mm[off:end])
+    return out
+
+
+def remove_dup_parallel(path, key=None, workers=None, keep_order=True,
+                        encoding='utf-8', tmpdir=None):
+    """remove_dict_dup over the lines of a file, sharded across processes
+
+    >>> import os, tempfile
+    >>> dirname = tempfile.mkdtemp()
+    >>> path = os.path.join(dirname, 'lines.txt')
+    >>> with open(path, 'w') as f:
+    ...     _ = f.write('b\\na\\nb\\nc\\na\\nd\\n' * 3 + 'e')
+    >>> list(remove_dup_parallel(path, workers=2))
+    ['b\\n', 'a\\n', 'c\\n', 'd\\n', 'e']
+    >>> list(remove_dup_parallel(path, key=str.strip, workers=3))
+    ['b\\n', 'a\\n', 'c\\n', 'd\\n', 'e']
+    >>> list(remove_dup_parallel(path, key=len, workers=2))
+    ['b\\n', 'e']
+    >>> import shutil; shutil.rmtree(dirname)
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    nsplits = min(4 * workers, max(1, size))  # small splits : load balance
+    bounds = [size * i // nsplits for i in range(nsplits + 1)]
+    with tempfile.TemporaryDirectory(dir=tmpdir) as dirname, \
+            ProcessPoolExecutor(workers) as ex:
+        for f in [ex.submit(_split_records, path, bounds[i], bounds[i + 1],
+                            key, encoding, workers, dirname, i)
+                  for i in range(nsplits)]:
+            f.result()
+        for f in [ex.submit(_shard_owner, dirname, shard, nsplits)
+                  for shard in range(workers)]:
+            f.result()
+        outs = [ex.submit(_write_split, path, dirname, i, workers,
+                          keep_order)
+                for i in range(nsplits)]
+        for out in outs:
+            with open(out.result(), encoding=encoding, newline='') as f:
+                yield from f
+
+
+def _bench_parallel_dedup(path, workers):
+    import time
+    start = time.process_time()
+    if workers == 0:
+        with open(path) as f:
+            out = sum(1 for _ in remove_dup(f))
+    else:
+        out = sum(1 for _ in remove_dup_parallel(path, workers=workers))
+    return out, time.process_time() - start
+
+
+def bench_0110_parallel(n=2 * 10**6):
+    # line oriented file input : 1 core set version vs n workers
+    #  - parent cpu : work that can't be spread across cores
+    import random
+    import tempfile
+    import time
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as dirname:
+        path = os.path.join(dirname, 'lines.txt')
+        with open(path, 'w') as f:
+            for _ in range(n):
+                f.write('line-{}\n'.format(rnd.randrange(n // 2)))
+        for workers in (0, 2, 4, 8):
+            start = time.perf_counter()
+            out, cpu = _bench_parallel_dedup(path, workers)
+            secs = time.perf_counter() - start
+            print('workers={} out={} {:.0f} lines/s parent cpu {:.2f}s'
+                  .format(workers or 'set', out, n / secs, cpu))
+
+
 # naming a slice
 def doctest_0111():
     """
@@ -426,6 +1845,150 @@ def doctest_0111():
     """
 
 
+# fixed width records from named slices
+#  - spec {name: slice} compiled into one struct format
+#    e.g. {'id': slice(0, 4), 'name': slice(5, 15)} -> '4s1x10s'
+#  - struct.iter_unpack cuts a whole block of lines in C,
+#    no per line str objects or per field slicing in python
+#  - file is mmap-ed, blocks are memoryviews of it (no copies)
+#  - overlapping slices can't be a struct : memoryview slicing instead
+_PADDING = ' \t\r\n\x0b\x0c\0'  # whitespace + NUL (low-values)
+
+
+class FixedWidthParser:
+    """
+    >>> data = (b'1001 Brian     Jones  \\n'
+    ...         b'1002 David     Beazley\\n')
+    >>> spec = {'uid': slice(0, 4), 'fname': slice(5, 15),
+    ...         'lname': slice(15, 22)}
+    >>> parser = FixedWidthParser(spec, record_len=23)
+    >>> parser.format
+    '4s1x10s7s1x'
+    >>> list(parser.iter_records(data))
+    [(b'1001', b'Brian     ', b'Jones  '), (b'1002', b'David     ', b'Beazley')]
+    >>> [bytes(v[2]) for v in parser.iter_views(data)]  # zero copy fields
+    [b'Jones  ', b'Beazley']
+    >>> parser.decode_columns(parser.iter_records(data))
+    {'uid': ['1001', '1002'], 'fname': ['Brian', 'David'], 'lname': ['Jones', 'Beazley']}
+    """
+    def __init__(self, spec, record_len):
+        import struct
+        self.names = list(spec)
+        self.record_len = record_len
+        self._slices = []
+        for name in self.names:
+            start, stop, step = spec[name].indices(record_len)
+            if step != 1 or start >= stop:
+                raise ValueError('bad slice for {!r}'.format(name))
+            self._slices.append((start, stop))
+
+        order = sorted(range(len(self._slices)), key=self._slices.__getitem__)
+        fmt = []
+        pos = 0
+        for i in order:
+            start, stop = self._slices[i]
+            if start < pos:  # overlap
+                self.format = self._struct = None
+                break
+            if start > pos:
+                fmt.append('{}x'.format(start - pos))
+            fmt.append('{}s'.format(stop - start))
+            pos = stop
+        else:
+            if pos < record_len:
+                fmt.append('{}x'.format(record_len - pos))
+            self.format = ''.join(fmt)
+            self._struct = struct.Struct(self.format)
+            # struct yields fields by position, reorder to spec order
+            self._order = [order.index(i) for i in range(len(order))]
+
+    def iter_records(self, buf):
+        """tuples of bytes per record, buf holds whole records"""
+        from operator import itemgetter
+        if self._struct is None:
+            for fields in self.iter_views(buf):
+                yield tuple(bytes(v) for v in fields)
+            return
+        it = self._struct.iter_unpack(buf)
+        if self._order == sorted(self._order):
+            yield from it
+        else:
+            yield from map(itemgetter(*self._order), it)
+
+    def iter_views(self, buf):
+        """tuples of memoryview per record, valid while buf lives"""
+        mv = memoryview(buf)
+        size = self.record_len
+        slices = self._slices
+        for base in range(0, len(mv) - size + 1, size):
+            yield tuple(mv[base + start:base + stop]
+                        for start, stop in slices)
+
+    def iter_file(self, path, block_records=65536, views=False):
+        """parse a file block by block through mmap
+
+        records : the map is closed when the generator finishes or is
+        closed early (close(), break + gc)
+        views=True : the views point into the map, so it is never closed
+        here, the caller owns its lifetime (unmapped once the generator
+        and every view are garbage collected)
+        """
+        import mmap
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if views:
+            yield from self._iter_blocks(mm, size, block_records,
+                                         self.iter_views)
+            return
+        try:
+            yield from self._iter_blocks(mm, size, block_records,
+                                         self.iter_records)
+        finally:
+            mm.close()
+
+    def _iter_blocks(self, mm, size, block_records, parse):
+        block = block_records * self.record_len
+        full = size - size % self.record_len
+        with memoryview(mm) as mv:
+            for start in range(0, full, block):
+                with mv[start:min(start + block, full)] as buf:
+                    yield from parse(buf)
+            if full < size:  # last line w/o newline
+                tail = bytes(mv[full:]).ljust(self.record_len, b'\n')
+                yield from parse(tail)
+
+    def decode_columns(self, records, encoding='ascii', strip=True):
+        """{name: [str, ...]} decoded one column at a time
+
+        one join + decode per column instead of one decode per field,
+        then cut at the fixed field width (fields may hold NUL padding)
+        strip removes whitespace and NUL padding
+
+        >>> parser = FixedWidthParser({'a': slice(0, 4), 'b': slice(4, 9)},
+        ...                           record_len=10)
+        >>> data = b'ab\\0\\0cdef\\0\\nxyzwq\\0\\0\\0\\0\\n'
+        >>> parser.decode_columns(parser.iter_records(data))
+        {'a': ['ab', 'xyzw'], 'b': ['cdef', 'q']}
+        """
+        columns = list(zip(*records)) or [()] * len(self.names)
+        out = {}
+        for name, (start, stop), col in zip(self.names, self._slices,
+                                            columns):
+            width = stop - start
+            text = b''.join(col).decode(encoding)
+            if len(text) == width * len(col):
+                values = [text[i:i + width]
+                          for i in range(0, len(text), width)]
+            else:  # multi byte chars : widths differ once decoded
+                values = [bytes(v).decode(encoding) for v in col]
+            out[name] = [v.strip(_PADDING) for v in values] if strip \
+                else values
+        return out
+
+
 # get top n frequent items
 def doctest_0112():
     """
@@ -463,6 +2026,162 @@ def doctest_0112():
     """
 
 
+# approximate Counter for high cardinality streams
+#  - count-min sketch : depth rows x width counters, fixed memory
+#    - estimate = min over rows, never below the true count
+#    - estimate <= true + epsilon * total w/ probability 1 - delta
+#  - most_common : keeps only `track` heavy hitter candidates
+#  - hashes are process independent (blake2b) so sketches merge w/ +
+class CountMinSketch:
+    """
+    >>> words = [
+    ...     'aaa', 'bbb', 'ccc', 'ddd', 'aaa',
+    ...     'aaa', 'eee', 'bbb', 'ccc', 'ccc'
+    ... ]
+    >>> word_counts = CountMinSketch(epsilon=0.01, delta=0.01)
+    >>> word_counts.update(words)
+    >>> word_counts.most_common(2)
+    [('aaa', 3), ('ccc', 3)]
+    >>> word_counts['aaa'], word_counts['zzz']
+    (3, 0)
+    >>> word_counts.update({'aaa': 1, 'ddd': 1})  # Counter like mapping
+    >>> combine = word_counts + word_counts
+    >>> combine.most_common(2)
+    [('aaa', 8), ('ccc', 6)]
+    >>> combine.total, combine.width, combine.depth
+    (24, 272, 5)
+
+    # keys like Counter : 1 and '1' differ, 1 and 1.0 are the same
+    >>> nums = CountMinSketch(epsilon=0.01, delta=0.01)
+    >>> nums.update([1, 1, 1.0])
+    >>> nums[1], nums['1']
+    (3, 0)
+    """
+    def __init__(self, epsilon=0.0001, delta=0.001, track=100):
+        import math
+        from array import array
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise ValueError('epsilon and delta must be in (0, 1)')
+        self.epsilon = epsilon
+        self.delta = delta
+        self.track = track
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.total = 0
+        self._table = array('Q', bytes(8 * self.width * self.depth))
+        self._top = {}  # heavy hitter candidate -> estimate
+        self._low = None
+
+    def _cells(self, item):
+        from hashlib import blake2b
+        try:
+            data = _stable_bytes(item)  # 1 != '1', 1 == 1.0 like Counter
+        except TypeError:  # other hashables : tag w/ the type name
+            data = 'r{}:{!r}'.format(type(item).__qualname__,
+                                     item).encode('utf-8', 'surrogatepass')
+        h = int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
+        h1, h2 = h & 0xffffffff, (h >> 32) | 1
+        w = self.width
+        return [row * w + (h1 + row * h2) % w for row in range(self.depth)]
+
+    def add(self, item, count=1):
+        table = self._table
+        est = None
+        for cell in self._cells(item):
+            c = table[cell] + count
+            table[cell] = c
+            if est is None or c < est:
+                est = c
+        self.total += count
+        self._offer(item, est)
+
+    def _offer(self, item, est):
+        top = self._top
+        if item in top or len(top) < self.track:
+            top[item] = est
+            return
+        # _low : lower bound of the smallest tracked estimate
+        #  - tracked estimates only grow, so a stale value stays a bound
+        if self._low is not None and est <= self._low:
+            return
+        low = min(top, key=top.__getitem__)
+        self._low = top[low]
+        if self._low < est:
+            del top[low]
+            top[item] = est
+            self._low = None
+
+    def update(self, items):
+        if hasattr(items, 'items'):
+            for item, count in items.items():
+                self.add(item, count)
+        else:
+            for item in items:
+                self.add(item)
+
+    def __getitem__(self, item):
+        table = self._table
+        return min(table[cell] for cell in self._cells(item))
+
+    def most_common(self, n=None):
+        top = sorted(((self[item], item) for item in self._top),
+                     key=lambda p: -p[0])
+        return [(item, est) for est, item in top[:n]]
+
+    def __add__(self, other):
+        from array import array
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError('can only merge sketches of the same size')
+        merged = CountMinSketch(self.epsilon, self.delta,
+                                max(self.track, other.track))
+        merged._table = array('Q', map(sum, zip(self._table, other._table)))
+        merged.total = self.total + other.total
+        for item in list(self._top) + list(other._top):
+            merged._offer(item, merged[item])
+        return merged
+
+
+def _zipf_words(n, vocab, seed=0):
+    # sample word list scaled up : long tail of distinct words
+    import random
+    rnd = random.Random(seed)
+    base = ['aaa', 'bbb', 'ccc', 'ddd', 'eee']
+    for _ in range(n):
+        if rnd.random() < 0.5:  # heavy head
+            rank = int(rnd.paretovariate(1.1)) - 1
+            yield base[rank] if rank < 5 else 'h{}'.format(rank)
+        else:  # uniform tail
+            yield 'w{}'.format(rnd.randrange(vocab))
+
+
+def _count_exact(n, vocab):
+    from collections import Counter
+    c = Counter(_zipf_words(n, vocab))
+    return dict(c.most_common(10)), len(c)
+
+
+def _count_sketch(n, vocab, epsilon):
+    s = CountMinSketch(epsilon=epsilon, delta=0.001, track=100)
+    s.update(_zipf_words(n, vocab))
+    return dict(s.most_common(10)), s.width * s.depth
+
+
+def bench_0112(n=10**6, vocab=10**7, epsilon=0.0001):
+    # run w/ n=10**8 for the full size comparison (takes hours)
+    exact, secs, peak = common_util.measure_alloc(_count_exact, n, vocab)
+    exact, distinct = exact
+    print('Counter  {:.1f}s peak {:.1f} MB ({} distinct)'.format(
+        secs, peak / 2**20, distinct))
+    approx, secs, peak = common_util.measure_alloc(
+        _count_sketch, n, vocab, epsilon)
+    approx, cells = approx
+    print('sketch   {:.1f}s peak {:.1f} MB ({} counters)'.format(
+        secs, peak / 2**20, cells))
+    hits = len(exact.keys() & approx.keys())
+    err = max(abs(approx.get(k, 0) - v) / v for k, v in exact.items())
+    print('top10 overlap {}/10, max relative error {:.4%}'.format(hits, err))
+
+
 # sort list of dict by key
 def test_0113():
     rows = [
@@ -496,6 +2215,11 @@ def test_0113():
     min(rows, key=itemgetter('uid'))
     max(rows, key=itemgetter('uid'))
 
+    # repeated queries : keep sort indexes instead of re-sorting
+    table = ColumnTable(['fname', 'lname', 'uid'], rows)
+    pprint(table.sorted_by('lname', 'fname'))
+    print(table.min('uid'), table.max('uid'))
+
 
 # sort custom object
 def test_0114():
@@ -518,6 +2242,199 @@ def test_0114():
     print(s)
 
 
+# sorted list w/ cheap inserts
+#  - list of sublists (each <= 2 * load items) + max of each sublist
+#  - bisect on maxes then on one sublist : insert/remove shift only
+#    a sublist instead of the whole list
+class _SortedList:
+    _load = 1000
+
+    def __init__(self, items=()):
+        items = sorted(items)
+        load = self._load
+        self._lists = [items[i:i + load] for i in range(0, len(items), load)]
+        self._maxes = [sub[-1] for sub in self._lists]
+        self._len = len(items)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for sub in self._lists:
+            yield from sub
+
+    def __reversed__(self):
+        for sub in reversed(self._lists):
+            yield from reversed(sub)
+
+    def __getitem__(self, i):
+        # ends (min/max) are O(1), other indexes walk the sublists
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('index out of range')
+        if i == 0:
+            return self._lists[0][0]
+        if i == self._len - 1:
+            return self._lists[-1][-1]
+        for sub in self._lists:
+            if i < len(sub):
+                return sub[i]
+            i -= len(sub)
+
+    def add(self, val):
+        from bisect import bisect_right, insort
+        lists, maxes = self._lists, self._maxes
+        self._len += 1
+        if not maxes:
+            lists.append([val])
+            maxes.append(val)
+            return
+        i = bisect_right(maxes, val)
+        if i == len(maxes):
+            i -= 1
+            lists[i].append(val)
+            maxes[i] = val
+        else:
+            insort(lists[i], val)
+        if len(lists[i]) > 2 * self._load:
+            sub = lists[i]
+            half = len(sub) // 2
+            lists[i:i + 1] = [sub[:half], sub[half:]]
+            maxes[i:i + 1] = [sub[half - 1], sub[-1]]
+
+    def remove(self, val):
+        from bisect import bisect_left
+        lists, maxes = self._lists, self._maxes
+        i = bisect_left(maxes, val)
+        if i < len(maxes):
+            sub = lists[i]
+            j = bisect_left(sub, val)
+            if sub[j] == val:
+                del sub[j]
+                self._len -= 1
+                if not sub:
+                    del lists[i], maxes[i]
+                elif j == len(sub):
+                    maxes[i] = sub[-1]
+                return
+        raise ValueError('{!r} not in list'.format(val))
+
+    def irange(self, lo=None, hi=None, inclusive=(True, True)):
+        """values in [lo, hi] (None : unbounded), bounds per inclusive"""
+        from bisect import bisect_left, bisect_right
+        lists, maxes = self._lists, self._maxes
+        if lo is None:
+            i, j = 0, 0
+        else:
+            find = bisect_left if inclusive[0] else bisect_right
+            i = find(maxes, lo)
+            j = find(lists[i], lo) if i < len(lists) else 0
+        for sub in lists[i:]:
+            if hi is not None and not (sub[-1] < hi or
+                                       inclusive[1] and sub[-1] == hi):
+                find = bisect_right if inclusive[1] else bisect_left
+                yield from sub[j:find(sub, hi)]
+                return
+            yield from sub[j:]
+            j = 0
+
+
+# columnar table w/ persistent sort indexes
+#  - rows stored as one list per field
+#  - index per sort key : sorted (key tuple, row id), built on first
+#    query and kept up to date on insert
+#    - row id in entry keeps equal keys in insert order (stable)
+#  - sorted_by is O(n), min/max O(1), range scans O(log n + k)
+class ColumnTable:
+    """
+    >>> rows = [
+    ...     {'fname': 'Brian', 'lname': 'Jones', 'uid': 1003},
+    ...     {'fname': 'David', 'lname': 'Beazley', 'uid': 1002},
+    ...     {'fname': 'John', 'lname': 'Cleese', 'uid': 1001},
+    ... ]
+    >>> table = ColumnTable(['fname', 'lname', 'uid'], rows)
+    >>> [r['fname'] for r in table.sorted_by('fname')]
+    ['Brian', 'David', 'John']
+    >>> table.append({'fname': 'Big', 'lname': 'Jones', 'uid': 1004})
+    >>> [r['fname'] for r in table.sorted_by('fname')]  # index updated
+    ['Big', 'Brian', 'David', 'John']
+    >>> [r['fname'] for r in table.sorted_by('lname', 'fname')]
+    ['David', 'John', 'Big', 'Brian']
+    >>> table.min('uid')
+    {'fname': 'John', 'lname': 'Cleese', 'uid': 1001}
+    >>> table.max('uid')['fname']
+    'Big'
+    >>> [r['uid'] for r in table.range('uid', 1002, 1004)]  # [lo, hi)
+    [1002, 1003]
+    """
+    def __init__(self, fields, rows=()):
+        self.fields = tuple(fields)
+        self._columns = [[] for _ in self.fields]
+        self._indexes = {}  # fields tuple -> _SortedList
+        self._len = 0
+        self.extend(rows)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return (self.row(i) for i in range(self._len))
+
+    def row(self, rowid):
+        return {f: col[rowid] for f, col in zip(self.fields, self._columns)}
+
+    def _key(self, cols, rowid):
+        return tuple(col[rowid] for col in cols)
+
+    def _cols(self, fields):
+        return [self._columns[self.fields.index(f)] for f in fields]
+
+    def append(self, row):
+        rowid = self._len
+        for f, col in zip(self.fields, self._columns):
+            col.append(row[f])
+        self._len += 1
+        for fields, index in self._indexes.items():
+            index.add((self._key(self._cols(fields), rowid), rowid))
+
+    def extend(self, rows):
+        rows = list(rows)
+        if len(rows) > self._len:
+            # cheaper to rebuild indexes on next query than n inserts
+            self._indexes.clear()
+        for row in rows:
+            self.append(row)
+
+    def _index(self, fields):
+        index = self._indexes.get(fields)
+        if index is None:
+            cols = self._cols(fields)
+            index = _SortedList((self._key(cols, i), i)
+                                for i in range(self._len))
+            self._indexes[fields] = index
+        return index
+
+    def sorted_by(self, *fields):
+        return [self.row(i) for _, i in self._index(fields)]
+
+    def min(self, field):
+        return self.row(self._index((field,))[0][1])
+
+    def max(self, field):
+        return self.row(self._index((field,))[-1][1])
+
+    def range(self, fields, lo=None, hi=None):
+        """rows w/ lo <= key < hi, key is a value or a tuple of values"""
+        if isinstance(fields, str):
+            fields = (fields,)
+            lo = None if lo is None else (lo,)
+            hi = None if hi is None else (hi,)
+        index = self._index(tuple(fields))
+        bounds = [None if b is None else (b,) for b in (lo, hi)]
+        return [self.row(i) for _, i in index.irange(*bounds)]
+
+
 # group by
 def test_0115():
     rows = [
@@ -558,6 +2475,149 @@ def test_0115():
     pprint(rows_by_date)
     print(rows_by_date['07/01/2012'])
 
+    # streaming aggregation : only per group states are kept
+    aggs = {'n': agg_count(), 'addresses': agg_collect(itemgetter('address'))}
+    for date, agg in group_by(rows, itemgetter('date'), aggs):
+        print(date, agg)
+
+
+# group by w/o keeping all rows
+#  - aggregate : init() -> state, step(state, row) -> state,
+#                merge(state, state) -> state, final(state) -> value
+#  - hash aggregation while groups fit in max_groups
+#  - otherwise partial states are spilled as key sorted runs,
+#    then heapq.merge + groupby combine them (output sorted by key)
+Aggregate = namedtuple('Aggregate', ['init', 'step', 'merge', 'final'])
+
+
+def _identity(x):
+    return x
+
+
+def agg_count():
+    return Aggregate(int, lambda s, row: s + 1, operator.add, _identity)
+
+
+def agg_sum(get):
+    return Aggregate(int, lambda s, row: s + get(row), operator.add,
+                     _identity)
+
+
+def _keep_min(a, b):
+    return b if a is None or (b is not None and b < a) else a
+
+
+def _keep_max(a, b):
+    return b if a is None or (b is not None and a < b) else a
+
+
+def agg_min(get):
+    return Aggregate(lambda: None, lambda s, row: _keep_min(s, get(row)),
+                     _keep_min, _identity)
+
+
+def agg_max(get):
+    return Aggregate(lambda: None, lambda s, row: _keep_max(s, get(row)),
+                     _keep_max, _identity)
+
+
+def agg_first(get=_identity):
+    # (value,) tuple : a stored None value still counts as found
+    return Aggregate(lambda: None,
+                     lambda s, row: (get(row),) if s is None else s,
+                     lambda a, b: b if a is None else a,
+                     lambda s: None if s is None else s[0])
+
+
+def agg_collect(get=_identity):
+    def step(s, row):
+        s.append(get(row))
+        return s
+    return Aggregate(list, step, operator.add, _identity)
+
+
+def _spill_groups(groups, dirname, runs):
+    import pickle
+    path = os.path.join(dirname, 'run-{}'.format(len(runs)))
+    with open(path, 'wb') as f:
+        for item in sorted(groups.items(), key=operator.itemgetter(0)):
+            pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+    runs.append(path)
+    groups.clear()
+
+
+def group_by(rows, key, aggregates, max_groups=100000, tmpdir=None):
+    """yields (group key, {name: value}) from a row iterator
+
+    group keys must be sortable once max_groups is exceeded
+
+    >>> from operator import itemgetter
+    >>> rows = [
+    ...     {'address': '5412 N CLARK', 'date': '07/01/2012'},
+    ...     {'address': '5148 N CLARK', 'date': '07/04/2012'},
+    ...     {'address': '5800 N 58TH', 'date': '07/02/2012'},
+    ...     {'address': '2122 N CLARK', 'date': '07/03/2012'},
+    ...     {'address': '5645 N RAVENSWOOD', 'date': '07/02/2012'},
+    ... ]
+    >>> aggs = {'n': agg_count(), 'first': agg_first(itemgetter('address'))}
+    >>> for date, agg in group_by(rows, itemgetter('date'), aggs):
+    ...     print(date, agg)
+    07/01/2012 {'n': 1, 'first': '5412 N CLARK'}
+    07/04/2012 {'n': 1, 'first': '5148 N CLARK'}
+    07/02/2012 {'n': 2, 'first': '5800 N 58TH'}
+    07/03/2012 {'n': 1, 'first': '2122 N CLARK'}
+
+    # more groups than max_groups : spilled, comes out sorted by key
+    >>> for date, agg in group_by(rows, itemgetter('date'), aggs,
+    ...                           max_groups=2):
+    ...     print(date, agg)
+    07/01/2012 {'n': 1, 'first': '5412 N CLARK'}
+    07/02/2012 {'n': 2, 'first': '5800 N 58TH'}
+    07/03/2012 {'n': 1, 'first': '2122 N CLARK'}
+    07/04/2012 {'n': 1, 'first': '5148 N CLARK'}
+    """
+    import heapq
+    import shutil
+    import tempfile
+    from itertools import groupby
+
+    names = list(aggregates)
+    aggs = [aggregates[name] for name in names]
+    nagg = range(len(aggs))
+    groups = {}
+    runs = []
+    dirname = None
+    try:
+        for row in rows:
+            k = key(row)
+            states = groups.get(k)
+            if states is None:
+                if len(groups) >= max_groups:
+                    if dirname is None:
+                        dirname = tempfile.mkdtemp(dir=tmpdir)
+                    _spill_groups(groups, dirname, runs)
+                states = groups[k] = [a.init() for a in aggs]
+            for i in nagg:
+                states[i] = aggs[i].step(states[i], row)
+
+        if not runs:
+            for k, states in groups.items():
+                yield k, {names[i]: aggs[i].final(states[i]) for i in nagg}
+            return
+
+        _spill_groups(groups, dirname, runs)
+        # runs are in input order, heapq.merge keeps it for equal keys
+        merged = heapq.merge(*[_pickle_records(p) for p in runs],
+                             key=operator.itemgetter(0))
+        for k, parts in groupby(merged, key=operator.itemgetter(0)):
+            _, states = next(parts)
+            for _, other in parts:
+                states = [aggs[i].merge(states[i], other[i]) for i in nagg]
+            yield k, {names[i]: aggs[i].final(states[i]) for i in nagg}
+    finally:
+        if dirname is not None:
+            shutil.rmtree(dirname, ignore_errors=True)
+
 
 # filtering sequences
 def test_0116():
@@ -604,6 +2664,193 @@ def test_0116():
     filtered = list(compress(addresses, more5))
     print(filtered)
 
+    # same thing on whole columns at once : numpy if installed
+    filtered, fcounts = filter_columns(counts, lambda c: c > 5,
+                                       addresses, counts)
+    print(filtered, fcounts)
+
+
+# vectorized filtering of parallel columns
+#  - cond works on a whole numpy array : lambda c: c > 5
+#    (combine conditions w/ & |, not and / or : works on both paths
+#     negate by flipping the comparison, ~ on a python bool is -1 / -2)
+#  - w/o numpy the same cond is applied per element
+def make_mask(values, cond):
+    """boolean mask of cond over values
+
+    >>> [bool(m) for m in make_mask([1, 3, 10, 4, 7], lambda c: c > 5)]
+    [False, False, True, False, True]
+    >>> [bool(m) for m in make_mask([1, 3, 10, 4, 7],
+    ...                             lambda c: (c > 2) & (c <= 7))]
+    [False, True, False, True, True]
+    """
+    if np is not None:
+        return np.asarray(cond(np.asarray(values)), dtype=bool)
+    return [bool(cond(v)) for v in values]
+
+
+def compress_columns(mask, *columns):
+    """itertools.compress on every column w/ one mask
+
+    numpy arrays stay arrays, other columns come back as lists
+
+    >>> compress_columns([True, False, True], ['a', 'b', 'c'], [1, 2, 3])
+    (['a', 'c'], [1, 3])
+    >>> compress_columns([True, True, False], [1, 'a', 2.5], ['x\\0', 'y'])
+    ([1, 'a'], ['x\\x00', 'y'])
+    """
+    from itertools import compress
+    if np is not None:
+        mask = np.asarray(mask, dtype=bool)
+        # lists are compressed as is : np.asarray would coerce the values
+        flags = mask.tolist()
+        return tuple(col[mask] if isinstance(col, np.ndarray)
+                     else list(compress(col, flags)) for col in columns)
+    return tuple(list(compress(col, mask)) for col in columns)
+
+
+def filter_columns(values, cond, *columns):
+    """
+    >>> addresses = ['5412 N CLARK', '5148 N CLARK', '5800 N 58TH']
+    >>> counts = [1, 3, 10]
+    >>> filter_columns(counts, lambda c: c > 2, addresses, counts)
+    (['5148 N CLARK', '5800 N 58TH'], [3, 10])
+    """
+    return compress_columns(make_mask(values, cond), *columns)
+
+
+def bench_0116(n=10**6):
+    import random
+    import time
+    from itertools import compress
+    rnd = random.Random(0)
+    counts = [rnd.randrange(10) for _ in range(n)]
+    addresses = ['{} N CLARK'.format(i) for i in range(n)]
+
+    start = time.perf_counter()
+    list(compress(addresses, [c > 5 for c in counts]))
+    base = time.perf_counter() - start
+    print('compress      {:.3f}s'.format(base))
+
+    start = time.perf_counter()
+    [a for a, c in zip(addresses, counts) if c > 5]
+    print('comprehension {:.3f}s'.format(time.perf_counter() - start))
+
+    if np is not None:  # arrays prepared once, as a column store would
+        counts, addresses = np.asarray(counts), np.asarray(addresses)
+    start = time.perf_counter()
+    filter_columns(counts, lambda c: c > 5, addresses, counts)
+    secs = time.perf_counter() - start
+    print('filter_columns {:.3f}s ({}) x{:.1f}'.format(
+        secs, 'numpy' if np is not None else 'pure python', base / secs))
+
+
+# dictionary encoded string column
+#  - each distinct value stored once in a code table
+#  - rows hold 4 byte codes in array('I') instead of str references
+#    (parsed rows usually get their own str object per field)
+#  - group by / filter compare small ints, decode only for output
+class DictColumn:
+    """
+    >>> dates = DictColumn(['07/01/2012', '07/04/2012', '07/02/2012',
+    ...                     '07/01/2012', '07/02/2012', '07/02/2012'])
+    >>> len(dates), dates[1], dates.values
+    (6, '07/04/2012', ['07/01/2012', '07/04/2012', '07/02/2012'])
+    >>> dates.codes
+    array('I', [0, 1, 2, 0, 2, 2])
+    >>> dates.count_by()
+    {'07/01/2012': 2, '07/04/2012': 1, '07/02/2012': 3}
+    >>> dates.where_eq('07/02/2012')
+    [2, 4, 5]
+    >>> dates.where_in(['07/01/2012', '07/04/2012', 'nope'])
+    [0, 1, 3]
+    >>> {k: list(v) for k, v in dates.group_indices().items()}
+    {'07/01/2012': [0, 3], '07/04/2012': [1], '07/02/2012': [2, 4, 5]}
+    """
+    def __init__(self, values=()):
+        from array import array
+        self.codes = array('I')
+        self.values = []  # code -> value
+        self._index = {}  # value -> code
+        self.extend(values)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[c] for c in self.codes)
+
+    def append(self, value):
+        self.extend((value,))
+
+    def extend(self, values):
+        index, table, codes = self._index, self.values, self.codes
+        for v in values:
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(table)
+                table.append(v)
+            codes.append(code)
+
+    def _np_codes(self):
+        return np.frombuffer(self.codes, dtype=np.uint32)
+
+    def count_by(self):
+        if np is not None and self.codes:
+            counts = np.bincount(self._np_codes(),
+                                 minlength=len(self.values)).tolist()
+        else:
+            counts = [0] * len(self.values)
+            for c in self.codes:
+                counts[c] += 1
+        return dict(zip(self.values, counts))
+
+    def group_indices(self):
+        """{value: array('I') of row numbers}"""
+        from array import array
+        groups = [array('I') for _ in self.values]
+        for i, c in enumerate(self.codes):
+            groups[c].append(i)
+        return dict(zip(self.values, groups))
+
+    def where_eq(self, value):
+        code = self._index.get(value)
+        if code is None:
+            return []
+        if np is not None:
+            return np.flatnonzero(self._np_codes() == code).tolist()
+        return [i for i, c in enumerate(self.codes) if c == code]
+
+    def where_in(self, values):
+        wanted = {self._index[v] for v in values if v in self._index}
+        if np is not None:
+            mask = np.isin(self._np_codes(), list(wanted))
+            return np.flatnonzero(mask).tolist()
+        return [i for i, c in enumerate(self.codes) if c in wanted]
+
+
+def _parsed_strings(n, distinct):
+    # like reading a csv : every row gets its own str object
+    return [' {} N CLARK'.format(i % distinct).strip() for i in range(n)]
+
+
+def _encoded_strings(n, distinct):
+    col = DictColumn()
+    col.extend(' {} N CLARK'.format(i % distinct).strip() for i in range(n))
+    return col
+
+
+def bench_0116_dict_column(n=10**6, distinct=1000):
+    for name, build in (('list of str', _parsed_strings),
+                        ('DictColumn', _encoded_strings)):
+        _, secs, peak = common_util.measure_alloc(build, n, distinct)
+        print('{:12s} {:6.1f} MB per million rows ({:.2f}s)'.format(
+            name, peak / 2**20 * 10**6 / n, secs))
+
 
 # get subset of dic
 def test_0117():
@@ -624,15 +2871,327 @@ def test_0117():
     sub2 = dict((key, value) for key, value in prices.items() if value > 200)
     print(sub2)
 
+    # many threshold queries : keep values sorted once
+    prices = ValueIndexedDict(prices)
+    print(prices.where_value_gt(200))
+
+
+# dict w/ a value ordered index
+#  - _SortedList of (value, key) next to the plain dict
+#  - where_value_gt / between / nlargest : O(log n + k)
+#  - set / del update both in O(log n) + one sublist shift
+#  - values and keys must be orderable (key breaks value ties)
+class ValueIndexedDict(MutableMapping):
+    """
+    >>> prices = ValueIndexedDict({
+    ...     'ACME': 45.23,
+    ...     'AAPL': 612.78,
+    ...     'IBM': 205.55,
+    ...     'HPQ': 37.20,
+    ...     'FB': 10.75
+    ... })
+    >>> prices.where_value_gt(200)
+    {'IBM': 205.55, 'AAPL': 612.78}
+    >>> prices['IBM'] = 150.0
+    >>> del prices['AAPL']
+    >>> prices.where_value_gt(200)
+    {}
+    >>> prices.between(30, 150)
+    {'HPQ': 37.2, 'ACME': 45.23, 'IBM': 150.0}
+    >>> prices.nlargest(2)
+    [('IBM', 150.0), ('ACME', 45.23)]
+    >>> len(prices), prices['FB']
+    (4, 10.75)
+    """
+    def __init__(self, *args, **kwargs):
+        self._data = dict(*args, **kwargs)
+        self._index = _SortedList((v, k) for k, v in self._data.items())
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self._index.remove((self._data[key], key))
+        self._data[key] = value
+        self._index.add((value, key))
+
+    def __delitem__(self, key):
+        value = self._data.pop(key)
+        self._index.remove((value, key))
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._data)
+
+    def where_value_gt(self, threshold):
+        """same as {k: v for k, v in d.items() if v > threshold}
+        but in value order"""
+        out = {}
+        for v, k in self._index.irange((threshold,)):
+            if v > threshold:  # (threshold, key) entries sort after lo
+                out[k] = v
+        return out
+
+    def between(self, lo, hi):
+        """lo <= value <= hi, in value order"""
+        out = {}
+        for v, k in self._index.irange((lo,)):
+            if hi < v:
+                break
+            out[k] = v
+        return out
+
+    def nlargest(self, n):
+        from itertools import islice
+        return [(k, v) for v, k in islice(reversed(self._index), n)]
+
 
 # mapping names to sequence elements
 #  - using namedtuple
 def test_0118():
-    from collections import namedtuple
     Subscriber = namedtuple('Subscriber', ['addr', 'joined'])
     sub = Subscriber('aaa@bbb.com', '2012-10-19')
     print(sub.addr, sub.joined)
 
+    # compact alternatives for millions of records
+    Subscriber = slots_record('Subscriber', ['addr', 'joined'])
+    sub = Subscriber('aaa@bbb.com', '2012-10-19')
+    print(sub, sub[0])
+    subs = RecordArray(['addr', 'joined', 'visits'], 'O O i')
+    subs.append(('aaa@bbb.com', '2012-10-19', 3))
+    print(subs[0].addr, subs[0][2])
+
+
+# compact records
+#  - slots_record : namedtuple like class w/ __slots__
+#                   no per instance __dict__, attributes are mutable
+#  - RecordArray : struct of arrays, one column per field
+#                  numeric fields in array.array ('i', 'd' ...),
+#                  'O' fields in a plain list
+#                  rows are light views (column refs + row number)
+def _check_fields(fields):
+    import keyword
+    fields = tuple(fields.replace(',', ' ').split()
+                   if isinstance(fields, str) else fields)
+    for f in fields:
+        if not f.isidentifier() or keyword.iskeyword(f) or \
+                f.startswith('_'):
+            raise ValueError('invalid field name: {!r}'.format(f))
+    if len(set(fields)) != len(fields):
+        raise ValueError('duplicate field names')
+    return fields
+
+
+def slots_record(name, fields):
+    """
+    >>> Subscriber = slots_record('Subscriber', ['addr', 'joined'])
+    >>> sub = Subscriber('aaa@bbb.com', joined='2012-10-19')
+    >>> sub
+    Subscriber(addr='aaa@bbb.com', joined='2012-10-19')
+    >>> sub.addr, sub[1], len(sub)
+    ('aaa@bbb.com', '2012-10-19', 2)
+    >>> addr, joined = sub
+    >>> hasattr(sub, '__dict__')
+    False
+    >>> Node = slots_record('Node', 'self parent')
+    >>> Node('a', parent=None)
+    Node(self='a', parent=None)
+    >>> Node.__module__ == __name__
+    True
+    """
+    import sys
+    fields = _check_fields(fields)
+    # generated __init__ like namedtuple : no *args loop per instance
+    #  - '_self' can't clash : field names never start with '_'
+    src = 'def __init__(_self, {}):\n'.format(', '.join(fields))
+    src += ''.join('    _self.{0} = {0}\n'.format(f) for f in fields)
+    ns = {}
+    exec(src if fields else src + '    pass\n', ns)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self)[i]
+        return getattr(self, fields[i])
+
+    def __iter__(self):
+        for f in fields:
+            yield getattr(self, f)
+
+    def __len__(self):
+        return len(fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return '{}({})'.format(name, ', '.join(
+            '{}={!r}'.format(f, getattr(self, f)) for f in fields))
+
+    def _asdict(self):
+        return {f: getattr(self, f) for f in fields}
+
+    cls = type(name, (), {
+        '__slots__': fields, '_fields': fields,
+        '__init__': ns['__init__'], '__getitem__': __getitem__,
+        '__iter__': __iter__, '__len__': __len__, '__eq__': __eq__,
+        '__hash__': None, '__repr__': __repr__, '_asdict': _asdict,
+    })
+    # like namedtuple : caller's module, so pickle can find the class
+    try:
+        cls.__module__ = sys._getframe(1).f_globals.get('__name__', '__main__')
+    except (AttributeError, ValueError):
+        pass
+    return cls
+
+
+def _column_property(col):
+    def get(self):
+        return col[self._i]
+
+    def put(self, value):
+        col[self._i] = value
+    return property(get, put)
+
+
+class RecordArray:
+    """
+    >>> subs = RecordArray(['addr', 'joined', 'visits'], 'O O i')
+    >>> subs.append(('aaa@bbb.com', '2012-10-19', 3))
+    >>> subs.extend([('ccc@ddd.com', '2013-01-02', 7)])
+    >>> len(subs), subs[1].addr, subs[1][2], subs[-1].visits
+    (2, 'ccc@ddd.com', 7, 7)
+    >>> subs[0].visits += 1
+    >>> subs.column('visits')
+    array('i', [4, 7])
+    >>> [tuple(row) for row in subs]
+    [('aaa@bbb.com', '2012-10-19', 4), ('ccc@ddd.com', '2013-01-02', 7)]
+
+    # bad rows leave the columns untouched
+    >>> subs.append(('x', 'y', 'bad'))
+    Traceback (most recent call last):
+      ...
+    TypeError: 'str' object cannot be interpreted as an integer
+    >>> subs.append(('x', 'y'))
+    Traceback (most recent call last):
+      ...
+    ValueError: expected 3 values, got 2
+    >>> subs.append(('x', 'y', 1))
+    >>> len(subs), tuple(subs[2])
+    (3, ('x', 'y', 1))
+    """
+    def __init__(self, fields, typecodes):
+        from array import array
+        self._fields = _check_fields(fields)
+        if isinstance(typecodes, str):
+            typecodes = typecodes.split()
+        if len(typecodes) != len(self._fields):
+            raise ValueError('need one typecode per field')
+        self._columns = [[] if t == 'O' else array(t) for t in typecodes]
+        cols = self._columns
+
+        # row view class bound to this array's columns
+        def __getitem__(view, i):
+            return cols[i][view._i]
+
+        def __iter__(view):
+            return (col[view._i] for col in cols)
+
+        attrs = {f: _column_property(c) for f, c in zip(self._fields, cols)}
+        attrs.update(__slots__=('_i',), _fields=self._fields,
+                     __getitem__=__getitem__, __iter__=__iter__,
+                     __len__=lambda view: len(cols))
+        self._view = type('RecordView', (), attrs)
+
+    def __len__(self):
+        return len(self._columns[0]) if self._columns else 0
+
+    def append(self, values):
+        values = tuple(values)
+        if len(values) != len(self._columns):
+            raise ValueError('expected {} values, got {}'.format(
+                len(self._columns), len(values)))
+        done = 0
+        try:
+            for col, v in zip(self._columns, values):
+                col.append(v)
+                done += 1
+        except Exception:
+            # undo partial appends : columns must stay the same length
+            for col in self._columns[:done]:
+                col.pop()
+            raise
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def column(self, field):
+        return self._columns[self._fields.index(field)]
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('record index out of range')
+        view = self._view.__new__(self._view)
+        view._i = i
+        return view
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _make_records(kind, n):
+    rows = (('user{}@example.com'.format(i), i % 3650, i * 0.5)
+            for i in range(n))
+    fields = ['addr', 'joined', 'score']
+    if kind == 'dict':
+        return [dict(zip(fields, r)) for r in rows]
+    if kind == 'namedtuple':
+        Rec = namedtuple('Rec', fields)
+        return [Rec(*r) for r in rows]
+    if kind == 'dataclass':
+        from dataclasses import make_dataclass
+        Rec = make_dataclass('Rec', fields)
+        return [Rec(*r) for r in rows]
+    if kind == 'slots':
+        Rec = slots_record('Rec', fields)
+        return [Rec(*r) for r in rows]
+    recs = RecordArray(fields, 'O i d')
+    recs.extend(rows)
+    return recs
+
+
+def bench_0118(n=10**6):
+    # memory per record incl. the field values (email strings dominate)
+    import time
+    for kind in ('dict', 'namedtuple', 'dataclass', 'slots', 'array'):
+        try:
+            recs, _, peak = common_util.measure_alloc(_make_records, kind, n)
+        except ImportError:  # dataclasses : python 3.7+
+            continue
+        start = time.perf_counter()
+        if kind == 'dict':
+            total = sum(r['score'] for r in recs)
+        else:
+            total = sum(r.score for r in recs)
+        secs = time.perf_counter() - start
+        print('{:10s} {:6.0f} bytes/record  attr access {:.3f}s ({})'.format(
+            kind, peak / n, secs, total))
+        if kind == 'array':  # views are slow, whole columns are not
+            start = time.perf_counter()
+            total = sum(recs.column('score'))
+            print('{:10s} column access {:.3f}s'.format(
+                '', time.perf_counter() - start))
+        del recs
 
 # 원본 데이터를 변환하면서 reduce 함수 적용하기
 def test_0119():
@@ -641,12 +3200,184 @@ def test_0119():
     s = sum(x * x for x in nums)
     print('sum:', s)
 
+    # same reduction w/o a python level loop
+    print('sum:', sum_of_squares(nums))
+
+
+# transform + reduce w/o per element python code
+#  - numpy if installed
+#  - else array('d') + sum(map(operator.mul, ...)) : loop runs in C
+#  - big inputs : chunks reduced by a process pool, data is copied
+#    once into shared memory so workers don't unpickle it
+#    (multiprocessing.shared_memory, python 3.8+)
+#  - inputs are converted to C doubles : ints become floats and big
+#    ones lose precision, use sum(x * x for x in xs) for exact ints
+def _as_floats(xs):
+    from array import array
+    if np is not None:
+        return np.asarray(xs, dtype=float)
+    return xs if isinstance(xs, array) and xs.typecode == 'd' \
+        else array('d', xs)
+
+
+def _partial(op, cols):
+    if np is not None and isinstance(cols[0], np.ndarray):
+        if op == 'sum':
+            return float(cols[0].sum())
+        if op == 'sumsq':
+            return float(np.dot(cols[0], cols[0]))
+        if op == 'wsum':
+            return float(np.dot(cols[0], cols[1])), float(cols[1].sum())
+        return float(np.dot(cols[0], cols[1]))
+    if op == 'sum':
+        return sum(cols[0], 0.0)
+    if op == 'sumsq':
+        return sum(map(operator.mul, cols[0], cols[0]), 0.0)
+    if op == 'wsum':  # one pass over the weights : (dot, sum of weights)
+        return sum(map(operator.mul, cols[0], cols[1]), 0.0), \
+            sum(cols[1], 0.0)
+    return sum(map(operator.mul, cols[0], cols[1]), 0.0)
+
+
+def _shm_partial(op, names, n, lo, hi):
+    from multiprocessing import shared_memory
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        if np is not None:
+            cols = [np.frombuffer(b.buf, dtype=float, count=n)[lo:hi]
+                    for b in blocks]
+        else:
+            cols = [b.buf[:8 * n].cast('d')[lo:hi] for b in blocks]
+        result = _partial(op, cols)
+        del cols  # views must go before close()
+        return result
+    finally:
+        for b in blocks:
+            b.close()
+
+
+def parallel_reduce(op, *columns, workers=None, chunks=None):
+    """op : 'sum', 'sumsq', 'dot' or 'wsum' over float columns
+
+    'wsum' returns (dot, sum of the 2nd column)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:  # python < 3.8 : no shared memory, stay serial
+        return _partial(op, [_as_floats(c) for c in columns])
+
+    cols = [_as_floats(c) for c in columns]
+    n = len(cols[0])
+    if n == 0:
+        return _partial(op, cols)
+    workers = workers or os.cpu_count() or 1
+    chunks = chunks or workers
+    blocks = []
+    try:
+        for col in cols:
+            block = shared_memory.SharedMemory(create=True,
+                                               size=max(8, 8 * n))
+            blocks.append(block)
+            if np is not None:
+                np.frombuffer(block.buf, dtype=float, count=n)[:] = col
+            else:
+                block.buf[:8 * n] = memoryview(col).cast('B')
+        names = [b.name for b in blocks]
+        step = max(1, -(-n // chunks))
+        with ProcessPoolExecutor(workers) as ex:
+            futures = [ex.submit(_shm_partial, op, names, n, lo,
+                                 min(lo + step, n))
+                       for lo in range(0, n, step)]
+            parts = [f.result() for f in futures]
+        if op == 'wsum':
+            return tuple(sum(p) for p in zip(*parts))
+        return sum(parts)
+    finally:
+        for b in blocks:
+            b.close()
+            b.unlink()
+
+
+# numpy is memory bound : a pool only pays off on huge inputs
+_PARALLEL_MIN = 10**7 if np is None else 10**9
+
+
+def _reduce(op, columns, parallel_min):
+    if parallel_min is None:
+        parallel_min = _PARALLEL_MIN
+    if len(columns[0]) >= parallel_min:
+        return parallel_reduce(op, *columns)
+    return _partial(op, [_as_floats(c) for c in columns])
+
+
+def sum_of_squares(xs, parallel_min=None):
+    """
+    >>> sum_of_squares([1, 2, 3, 4, 5])
+    55.0
+    >>> sum_of_squares(range(6), parallel_min=2)  # w/ process pool
+    55.0
+    >>> sum_of_squares([], parallel_min=0)
+    0.0
+
+    # ints are reduced as floats
+    >>> sum_of_squares([10**20])
+    1e+40
+    """
+    return _reduce('sumsq', [xs], parallel_min)
+
+
+def dot(xs, ys, parallel_min=None):
+    """
+    >>> dot([1, 2, 3], [4, 5, 6])
+    32.0
+    """
+    if len(xs) != len(ys):
+        raise ValueError('length mismatch')
+    return _reduce('dot', [xs, ys], parallel_min)
+
+
+def weighted_mean(values, weights, parallel_min=None):
+    """
+    >>> weighted_mean([1, 2, 3], [3, 1, 0])
+    1.25
+    >>> weighted_mean(range(4), [1, 1, 1, 1], parallel_min=2)
+    1.5
+    """
+    if len(values) != len(weights):
+        raise ValueError('length mismatch')
+    # dot and sum of weights in the same pass / the same chunk task
+    num, total = _reduce('wsum', [values, weights], parallel_min)
+    if not total:
+        raise ZeroDivisionError('weights sum to zero')
+    return num / total
+
+
+def bench_0119(n=10**7):
+    import random
+    import time
+    from array import array
+    rnd = random.Random(0)
+    nums = array('d', (rnd.random() for _ in range(n)))
+    listed = nums.tolist()
+    for name, func in (
+            ('genexp', lambda: sum(x * x for x in listed)),
+            ('sum_of_squares', lambda: sum_of_squares(nums)),
+            ('parallel', lambda: parallel_reduce('sumsq', nums))):
+        start = time.perf_counter()
+        func()
+        print('{:15s} {:.3f}s'.format(name, time.perf_counter() - start))
+
 
 if __name__ == '__main__':
     import doctest
+    import sys
     doctest.testmod(verbose=True)
 
     common_util.call_funcs(vars(), lambda s: s.startswith('test_'))
+    # benchmarks are slow : run only w/ 'python ch01.py bench'
+    if 'bench' in sys.argv[1:]:
+        common_util.call_funcs(vars(), lambda s: s.startswith('bench_'))
     '''
     test_funcs = [v for k, v in vars().items() if k.startswith('test_')]
     for func in test_funcs:
@@ -25,6 +25,87 @@ def test_0201():
     fields = re.split(r'(?:;|,|\s)\s*', line)
     print(fields)
 
+    # 큰 파일은 split_stream 으로 블록 단위 처리
+    import io
+    f = io.StringIO(line * 3)
+    print(list(split_stream(f, r'(;|,|\s)\s*', blocksize=8)))
+
+
+def split_stream(f, pattern, blocksize=1 << 20, reach=1024):
+    """re.split over a file, read blocksize chars(bytes) at a time
+
+    >>> import io
+    >>> text = 'asdf fjdk; afed, fjek,asdf,     foo'
+    >>> list(split_stream(io.StringIO(text), r'[;,\\s]\\s*', blocksize=4))
+    ['asdf', 'fjdk', 'afed', 'fjek', 'asdf', 'foo']
+    >>> fields = list(split_stream(io.StringIO(text), r'(;|,|\\s)\\s*', 3))
+    >>> fields == re.split(r'(;|,|\\s)\\s*', text)
+    True
+    >>> list(split_stream(io.BytesIO(b'a,,b;c'), rb'[;,]+', blocksize=2))
+    [b'a', b'b', b'c']
+
+    # any pattern re.split takes : flags, backreferences, alternations
+    >>> list(split_stream(io.StringIO('aBc;d'), r'(?i)b|;', blocksize=2))
+    ['a', 'c', 'd']
+    >>> list(split_stream(io.StringIO('1"x"2'), r'(["\\'])x\\1', 2))
+    ['1', '"', '2']
+    >>> list(split_stream(io.StringIO('xxxxxabcyy'), r'abc|a', 6))
+    ['xxxxx', 'yy']
+    """
+    #  - 출력은 re.split(pattern, f.read()) 와 같음 : 캡쳐그룹 있으면 구분자 포함
+    #  - 원래 pattern 으로 finditer, 토큰은 직접 잘라냄
+    #  - 블록 끝에서 reach 글자 안에 시작하거나 끝에 닿은 매칭은 다음 블록과
+    #    합쳐 다시 찾음 : 'abc|a' 처럼 더 읽으면 달라질 수 있음
+    #  - 제약
+    #    - 구분자(lookahead 포함)가 시작 위치에서 reach 글자를 넘어 결정되면 안됨
+    #    - lookbehind 는 이전 블록을 못 봄
+    #    - 빈 문자열에 매칭되는 pattern 은 지원 안함
+    #  - 메모리 : blocksize + 가장 긴 토큰 + reach
+    if isinstance(pattern, (str, bytes)):
+        pattern = re.compile(pattern)
+    groups = pattern.groups
+    carry = None
+    while True:
+        block = f.read(blocksize)
+        if carry is None:
+            carry = block[:0]
+        buf = carry + block
+        size = len(buf)
+        final = size if not block else size - reach
+        out = []
+        pos = 0
+        for m in pattern.finditer(buf):
+            start, end = m.span()
+            if block and (start > final or end == size):
+                break   # 다음 블록에 따라 달라질 수 있음
+            out.append(buf[pos:start])
+            if groups:
+                out.extend(m.groups())
+            pos = end
+        if not block:
+            out.append(buf[pos:])
+            yield from out
+            return
+        carry = buf[pos:]
+        yield from out
+
+
+def bench_0201(n=10**6):
+    import io
+    import random
+    import time
+    rnd = random.Random(0)
+    text = ''.join(rnd.choice(('asdf', 'fjdk', 'afed')) +
+                   rnd.choice((' ', '; ', ',', ',     '))
+                   for _ in range(n))
+    for name, func in (
+            ('re.split', lambda: re.split(r'[;,\s]\s*', text)),
+            ('split_stream', lambda: list(split_stream(io.StringIO(text),
+                                                       r'[;,\s]\s*')))):
+        start = time.perf_counter()
+        func()
+        print('{:15s} {:.3f}s'.format(name, time.perf_counter() - start))
+
 
 # ====================================================
 # 0202 matching text at the start or end of a string
@@ -37,6 +118,169 @@ def test_0202():
     # tuple로 여러 매칭 조건 받을 수 있다.
     print(name.startswith(('http', 'https', 'ftp')))
 
+    # 조건이 아주 많으면 trie : 하나씩 비교하지 않고 문자열 길이만큼만 탐색
+    schemes = PrefixTrie({'http': 'web', 'https': 'secure web', 'ftp': 'file'})
+    print(schemes.longest(name))  # ('https', 'secure web')
+    domains = SuffixTrie.fromkeys(['.com', '.ccc/ddd'])
+    print(domains.endswith(name))  # True
+
+
+_end = object()     # trie 노드에서 payload 를 담는 key
+
+
+class PrefixTrie:
+    """prefixes w/ payloads, matched in O(len(string))
+
+    >>> t = PrefixTrie({'http': 1, 'https': 2, 'ftp': 3})
+    >>> t['h'] = 0
+    >>> t.longest('https://example.com')
+    ('https', 2)
+    >>> t.all('https://example.com')
+    [('h', 0), ('http', 1), ('https', 2)]
+    >>> t.startswith('ftp://x'), t.startswith('gopher://x')
+    (True, False)
+    >>> t.longest('gopher://x') is None
+    True
+    >>> len(t), 'http' in t, 'htt' in t, t['ftp']
+    (4, True, False, 3)
+    """
+    #  - 노드는 dict : 문자 -> 자식 노드, _end -> payload
+    #  - 탐색은 문자열 앞에서부터 노드를 따라가다 끊기면 멈춤
+    def __init__(self, items=()):
+        self._root = {}
+        self._size = 0
+        if isinstance(items, dict):
+            items = items.items()
+        for key, payload in items:
+            self[key] = payload
+
+    @classmethod
+    def fromkeys(cls, keys, payload=None):
+        return cls((key, payload) for key in keys)
+
+    def _chars(self, s):
+        return s
+
+    def __setitem__(self, key, payload):
+        node = self._root
+        for c in self._chars(key):
+            node = node.setdefault(c, {})
+        if _end not in node:
+            self._size += 1
+        node[_end] = payload
+
+    def _find(self, key):
+        node = self._root
+        for c in self._chars(key):
+            node = node.get(c)
+            if node is None:
+                return None
+        return node
+
+    def __getitem__(self, key):
+        node = self._find(key)
+        if node is None or _end not in node:
+            raise KeyError(key)
+        return node[_end]
+
+    def __contains__(self, key):
+        node = self._find(key)
+        return node is not None and _end in node
+
+    def __len__(self):
+        return self._size
+
+    def _walk(self, s):
+        """(matched length, payload) for every key that s starts with"""
+        node = self._root
+        if _end in node:
+            yield 0, node[_end]
+        for i, c in enumerate(self._chars(s), 1):
+            node = node.get(c)
+            if node is None:
+                return
+            if _end in node:
+                yield i, node[_end]
+
+    def _key(self, s, n):
+        return s[:n]
+
+    def longest(self, s):
+        """(key, payload) of the longest matching key, or None"""
+        found = None
+        for found in self._walk(s):
+            pass
+        if found is None:
+            return None
+        n, payload = found
+        return self._key(s, n), payload
+
+    def all(self, s):
+        """[(key, payload), ...] of the matching keys, shortest first"""
+        return [(self._key(s, n), payload) for n, payload in self._walk(s)]
+
+    def startswith(self, s):
+        node = self._root
+        if _end in node:
+            return True
+        for c in self._chars(s):
+            node = node.get(c)
+            if node is None:
+                return False
+            if _end in node:
+                return True
+        return False
+
+
+class SuffixTrie(PrefixTrie):
+    """suffixes w/ payloads : PrefixTrie over reversed strings
+
+    >>> t = SuffixTrie({'.com': 'com', 'example.com': 'example', '.org': 1})
+    >>> t.longest('www.example.com')
+    ('example.com', 'example')
+    >>> t.all('www.example.com')
+    [('.com', 'com'), ('example.com', 'example')]
+    >>> t.endswith('python.org'), t.endswith('python.net')
+    (True, False)
+    """
+    def _chars(self, s):
+        return reversed(s)
+
+    def _key(self, s, n):
+        return s[len(s) - n:]
+
+    def endswith(self, s):
+        return self.startswith(s)
+
+
+def bench_0202(n=10**5):
+    import random
+    import string
+    import time
+    rnd = random.Random(0)
+
+    def word(size):
+        return ''.join(rnd.choice(string.ascii_lowercase)
+                       for _ in range(size))
+
+    hosts = [word(6) for _ in range(n)]
+    urls = ['https://{}.com/{}'.format(h, word(8)) for h in hosts]
+    for m in (10, 100, 1000, 10000):
+        # 일부만 매칭되는 host prefix : 안 맞는 url 은 tuple 을 끝까지 비교
+        prefixes = ['https://' + (rnd.choice(hosts) if i % 10 == 0
+                                  else word(6))
+                    for i in range(m)]
+        as_tuple = tuple(prefixes)
+        trie = PrefixTrie.fromkeys(prefixes)
+        times = []
+        for func in (lambda: [u.startswith(as_tuple) for u in urls],
+                     lambda: [trie.startswith(u) for u in urls]):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        print('{:6d} prefixes : tuple {:.3f}s, trie {:.3f}s'.format(
+            m, *times))
+
 
 # ====================================================
 # 0203 matching strings using shell wildcard patterns
@@ -75,6 +319,145 @@ def test_0203():
          if fnmatchcase(addr, '54[0-9][0-9] *CLARK*')]
     print(r)
 
+    # 패턴이 많으면 PatternSet : 문자열당 한번에 매칭된 패턴 id 모두 얻음
+    patterns = PatternSet(['* ST', '54[0-9][0-9] *CLARK*', '*BROADWAY'])
+    for addr in addresses:
+        print(addr, patterns.match(addr))
+
+
+class PatternSet:
+    """many fnmatch patterns, matched in one pass per string
+
+    >>> ps = PatternSet(['*.txt', 'Dat[0-9]*', 'foo.*', 'foo.txt', '*'])
+    >>> ps.match('foo.txt')
+    [0, 2, 3, 4]
+    >>> ps.match('Dat45.csv')
+    [1, 4]
+    >>> ps.match('FOO.TXT')
+    [4]
+    >>> PatternSet(['*.txt', 'foo.*'], ignorecase=True).match('FOO.TXT')
+    [0, 1]
+    >>> list(PatternSet(['* ST', '54*']).filter(['5412 N CLARK ST', 'x']))
+    ['5412 N CLARK ST']
+    """
+    #  - 와일드카드 없는 패턴 : dict 조회
+    #  - 나머지는 앞/뒤 리터럴 중 긴 쪽(최대 8자)으로 묶음, 둘 다 없으면 공통 묶음
+    #    문자열은 해당 길이의 앞/뒤 조각으로 묶음을 찾음
+    #  - 묶음마다 정규식 하나 : 패턴마다 (?=(...)\Z) 선택 그룹
+    #    매칭된 패턴은 그룹이 문자열 전체를 캡쳐 -> compress 로 id 추출
+    #  - ignorecase : 패턴, 문자열 모두 lower() (windows 의 fnmatch 와 같음)
+    _keylen = 8
+
+    def __init__(self, patterns, ignorecase=False):
+        from collections import defaultdict
+        self.patterns = list(patterns)
+        self.ignorecase = ignorecase
+        self._exact = defaultdict(list)
+        heads, tails, wild = defaultdict(list), defaultdict(list), []
+        for pid, pat in enumerate(self.patterns):
+            if ignorecase:
+                pat = pat.lower()
+            head = re.match(r'[^*?[]*', pat).group()
+            if head == pat:
+                self._exact[pat].append(pid)
+                continue
+            tail = re.search(r'[^*?\]]*\Z', pat).group()
+            if head and len(head) >= len(tail):
+                heads[head[:self._keylen]].append((pid, pat))
+            elif tail:
+                tails[tail[-self._keylen:]].append((pid, pat))
+            else:
+                wild.append((pid, pat))
+        self._heads = {k: self._compile(p) for k, p in heads.items()}
+        self._tails = {k: self._compile(p) for k, p in tails.items()}
+        self._head_lens = sorted({len(k) for k in heads})
+        self._tail_lens = sorted({len(k) for k in tails})
+        self._wild = self._compile(wild) if wild else None
+
+    @staticmethod
+    def _compile(entries):
+        from fnmatch import translate
+        regex = re.compile(''.join(
+            '(?:(?=(?P<p{}>{})))?'.format(pid, translate(pat))
+            for pid, pat in entries))
+        # translate 결과에 그룹이 있을 수 있음 : 그룹 번호 -> pid 표
+        slots = [None] * regex.groups
+        for name, index in regex.groupindex.items():
+            if name.startswith('p'):
+                slots[index - 1] = int(name[1:])
+        return regex, slots
+
+    def _scan(self, compiled, name, found):
+        from itertools import compress
+        regex, slots = compiled
+        groups = regex.match(name).groups()
+        found.extend(pid for pid in compress(slots, groups)
+                     if pid is not None)
+
+    def match(self, name):
+        """ids of the patterns matching name, ascending"""
+        from fnmatch import fnmatchcase
+        if self.ignorecase:
+            name = name.lower()
+        if not name:  # 빈 캡쳐는 compress 에서 걸러짐 : 직접 비교
+            return [pid for pid, pat in enumerate(self.patterns)
+                    if fnmatchcase('', pat)]
+        found = list(self._exact.get(name, ()))
+        size = len(name)
+        buckets = [self._heads.get(name[:n])
+                   for n in self._head_lens if n <= size]
+        buckets += [self._tails.get(name[-n:])
+                    for n in self._tail_lens if n <= size]
+        buckets.append(self._wild)
+        for compiled in buckets:
+            if compiled is not None:
+                self._scan(compiled, name, found)
+        found.sort()
+        return found
+
+    def filter(self, names):
+        """names matching any of the patterns"""
+        return (name for name in names if self.match(name))
+
+
+def bench_0203(n=10**5, m=5000):
+    import random
+    import time
+    from fnmatch import fnmatchcase
+    rnd = random.Random(0)
+    streets = ['CLARK', 'ADDISON', 'GRANVILLE', 'BROADWAY', 'HALSTED']
+    kinds = ['ST', 'AVE', 'BLVD', 'RD']
+
+    def address():
+        return '{} {} {}{} {}'.format(
+            rnd.randint(1000, 9999), rnd.choice('NSEW'),
+            rnd.choice(streets), rnd.randint(0, m // 20),
+            rnd.choice(kinds))
+
+    patterns = ['{}* *{}{}*'.format(rnd.randint(1, 9), rnd.choice(streets),
+                                    rnd.randint(0, m // 20))
+                if i % 2 else
+                '*{}{} {}'.format(rnd.choice(streets), rnd.randint(0, m // 20),
+                                  rnd.choice(kinds))
+                for i in range(m)]
+    addresses = [address() for _ in range(n)]
+    start = time.perf_counter()
+    ps = PatternSet(patterns)
+    print('{:15s} {:.3f}s'.format('compile', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    fast = [ps.match(a) for a in addresses]
+    elapsed = time.perf_counter() - start
+    print('{:15s} {:.3f}s'.format('PatternSet', elapsed))
+    # fnmatchcase 는 너무 느림 : 일부만 돌려서 환산
+    k = max(1, n // 100)
+    start = time.perf_counter()
+    slow = [[pid for pid, pat in enumerate(patterns) if fnmatchcase(a, pat)]
+            for a in addresses[:k]]
+    elapsed = (time.perf_counter() - start) * n / k
+    print('{:15s} {:.3f}s (estimated)'.format('fnmatchcase', elapsed))
+    assert fast[:k] == slow
+
 
 # ====================================================
 # 0204 matching and searching for text patterns
@@ -164,6 +547,129 @@ def test_0205():
     r, n = datepattern.subn(r'\3-\1-\2', text)
     print(r, n)
 
+    # 같은 날짜가 반복되는 큰 로그 : DateRewriter 로 결과 재사용
+    print(DateRewriter().sub(text))
+
+
+def _day_mon_year(mon, day, year):
+    from calendar import month_abbr
+    if not 1 <= int(mon) <= 12:  # month_abbr[0] is ''
+        raise ValueError('bad month: {}'.format(mon))
+    return '{} {} {}'.format(day, month_abbr[int(mon)], year)
+
+
+class DateRewriter:
+    """rewrite m/d/y dates w/ a memo of each distinct match
+
+    >>> r = DateRewriter()
+    >>> r.sub('Today is 11/27/2012. PyCon starts 3/13/2013. 11/27/2012')
+    ('Today is 27 Nov 2012. PyCon starts 13 Mar 2013. 27 Nov 2012', 3)
+    >>> r.sub('13/1/2020 and 0/5/2012 are left as is')
+    ('13/1/2020 and 0/5/2012 are left as is', 2)
+    >>> r.cached
+    4
+    >>> DateRewriter(rewrite='{2}-{0}-{1}'.format).sub('on 3/13/2013')
+    ('on 2013-3-13', 1)
+    """
+    #  - rewrite(*groups) 는 매칭 문자열마다 한번만 호출 : 이후 dict 조회
+    #  - 잘못된 날짜(IndexError, ValueError)는 그대로 둠
+    #  - 파일은 블록 단위로 읽고 마지막 줄바꿈에서 잘라 처리 : 날짜는 줄을 넘지 않음
+    #  - rewrite 는 process pool 사용 시 pickle 가능해야 함 (module level 함수)
+    def __init__(self, pattern=r'(\d+)/(\d+)/(\d+)', rewrite=_day_mon_year):
+        self.pattern = re.compile(pattern)
+        self.rewrite = rewrite
+        self._memo = {}
+
+    @property
+    def cached(self):
+        return len(self._memo)
+
+    def _replace(self, m):
+        text = m.group()
+        try:
+            return self._memo[text]
+        except KeyError:
+            pass
+        try:
+            new = self.rewrite(*m.groups())
+        except (IndexError, ValueError):
+            new = text
+        self._memo[text] = new
+        return new
+
+    def sub(self, text):
+        """(new text, number of matches) like re.subn"""
+        return self.pattern.subn(self._replace, text)
+
+    def rewrite_file(self, src, dst, blocksize=1 << 22, encoding='utf-8'):
+        """rewrite src into dst, returns the number of matches"""
+        count = 0
+        carry = ''
+        with open(src, encoding=encoding, newline='') as fin, \
+                open(dst, 'w', encoding=encoding, newline='') as fout:
+            while True:
+                block = fin.read(blocksize)
+                if not block:
+                    break
+                carry += block
+                cut = carry.rfind('\n') + 1
+                if not cut:     # 줄이 블록보다 김 : 더 읽음
+                    continue
+                text, n = self.sub(carry[:cut])
+                fout.write(text)
+                count += n
+                carry = carry[cut:]
+            text, n = self.sub(carry)
+            fout.write(text)
+        return count + n
+
+    def rewrite_files(self, pairs, workers=None, **kwargs):
+        """[(src, dst), ...] -> [count, ...] across a process pool"""
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+        pairs = list(pairs)
+        srcs, dsts = zip(*pairs) if pairs else ((), ())
+        with ProcessPoolExecutor(workers) as ex:
+            return list(ex.map(partial(self.rewrite_file, **kwargs),
+                               srcs, dsts))
+
+
+def bench_0205(n=10**6):
+    import os
+    import random
+    import tempfile
+    import time
+    rnd = random.Random(0)
+    lines = ['{}/{}/{} GET /index.html 200\n'.format(
+        rnd.randint(1, 12), rnd.randint(1, 28), rnd.choice((2018, 2019)))
+        for _ in range(n)]
+    text = ''.join(lines)
+    datepattern = re.compile(r'(\d+)/(\d+)/(\d+)')
+
+    def change_date(m):
+        from calendar import month_abbr
+        mon_name = month_abbr[int(m.group(1))]
+        return '{} {} {}'.format(m.group(2), mon_name, m.group(3))
+
+    for name, func in (
+            ('callback', lambda: datepattern.subn(change_date, text)),
+            ('DateRewriter', lambda: DateRewriter().sub(text))):
+        start = time.perf_counter()
+        func()
+        print('{:15s} {:.3f}s'.format(name, time.perf_counter() - start))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pairs = []
+        for i in range(4):
+            src = os.path.join(tmpdir, 'access{}.log'.format(i))
+            with open(src, 'w') as f:
+                f.write(text)
+            pairs.append((src, src + '.out'))
+        start = time.perf_counter()
+        counts = DateRewriter().rewrite_files(pairs)
+        elapsed = time.perf_counter() - start
+        print('{:15s} {:.3f}s {}'.format('4 files', elapsed, counts))
+
 
 # ====================================================
 # 0206 searching and replacing case-insensitive text
@@ -195,6 +701,161 @@ def test_0206():
     r = re.sub('python', matchcase('snake'), text, flags=re.IGNORECASE)
     print(r)
 
+    # 바꿀 단어가 많으면 GlossaryReplacer : 모든 단어를 한번에 처리
+    glossary = GlossaryReplacer({'python': 'snake', 'upper': 'big'})
+    print(glossary.sub(text))  # ('BIG SNAKE, lower snake, Mixed Snake', 4)
+
+
+def _matchcase(text, word):
+    """word in the case of text : test_0206 의 matchcase 규칙"""
+    if text.isupper():
+        return word.upper()
+    elif text.islower():
+        return word.lower()
+    elif text[0].isupper():
+        return word.capitalize()
+    else:
+        return word
+
+
+class GlossaryReplacer:
+    """case-insensitive, case-preserving replace of many terms in one pass
+
+    >>> g = GlossaryReplacer({'python': 'snake', 'py': 'pie', 'he': 'she'})
+    >>> g.sub('UPPER PYTHON, lower python, Mixed Python, PyPI, the')
+    ('UPPER SNAKE, lower snake, Mixed Snake, PiePI, tshe', 5)
+    >>> GlossaryReplacer({'bc': 'x', 'abcd': 'y'}).sub('abcbcd')
+    ('axxd', 2)
+    >>> GlossaryReplacer({'bc': 'x', 'abcd': 'y'}).sub('zabcdz')
+    ('zyz', 1)
+    """
+    #  - Aho-Corasick : 모든 단어로 trie 를 만들고 실패 링크로 연결
+    #    문자열을 한번 훑으면서 모든 단어의 매칭을 찾음
+    #  - 겹치면 가장 왼쪽, 같은 위치면 가장 긴 단어 (re 의 긴 단어 우선 alternation 과 같음)
+    #  - 비교는 lower() 한 문자열로, 치환 결과는 _matchcase 로 원문 case 적용
+    def __init__(self, glossary):
+        from collections import deque
+        if isinstance(glossary, dict):
+            glossary = glossary.items()
+        self._words = {}    # lower term -> replacement
+        goto, fail, depth, longest = [{}], [0], [0], [0]
+        for term, word in glossary:
+            if not term:
+                raise ValueError('empty search term')
+            term = term.lower()
+            self._words[term] = word
+            node = 0
+            for c in term:
+                child = goto[node].get(c)
+                if child is None:
+                    child = goto[node][c] = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    depth.append(depth[node] + 1)
+                    longest.append(0)
+                node = child
+            longest[node] = len(term)
+        # BFS : 실패 링크 = 가장 긴 proper suffix 노드
+        #  - longest : 이 노드에서 끝나는 가장 긴 단어 길이 (실패 링크 포함)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in goto[node].items():
+                f = fail[node]
+                while f and c not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(c, 0)
+                if not longest[child]:
+                    longest[child] = longest[fail[child]]
+                queue.append(child)
+        self._goto, self._fail = goto, fail
+        self._depth, self._longest = depth, longest
+
+    def _fold(self, text):
+        folded = text.lower()
+        if len(folded) != len(text):    # 길이가 바뀌는 문자는 그대로 둠
+            folded = ''.join(c.lower() if len(c.lower()) == 1 else c
+                             for c in text)
+        return folded
+
+    def finditer(self, text):
+        """(start, end) of the leftmost-longest non-overlapping matches"""
+        goto, fail = self._goto, self._fail
+        depth, longest = self._depth, self._longest
+        folded = self._fold(text)
+        size = len(folded)
+        node = 0
+        best = None     # (start, end) : 더 길어질 수 있는 후보
+        i = 0
+        while i < size or best is not None:
+            if i == size:   # 끝까지 봤음 : 후보 확정 후 그 뒤부터 다시
+                yield best
+                i, node, best = best[1], 0, None
+                continue
+            c = folded[i]
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            i += 1
+            if best is not None and i - depth[node] > best[0]:
+                # 후보 시작 위치를 포함하는 더 긴 매칭은 불가 : 확정
+                yield best
+                i, node, best = best[1], 0, None
+                continue
+            n = longest[node]
+            if n and (best is None or i - n <= best[0]):
+                best = (i - n, i)
+
+    def sub(self, text):
+        """(new text, number of replacements) like re.subn"""
+        words = self._words
+        parts = []
+        last = 0
+        for start, end in self.finditer(text):
+            found = text[start:end]
+            parts.append(text[last:start])
+            parts.append(_matchcase(found, words[self._fold(found)]))
+            last = end
+        parts.append(text[last:])
+        return ''.join(parts), (len(parts) - 1) // 2
+
+
+def bench_0206(n=10**4, size=10**5):
+    import random
+    import string
+    import time
+    rnd = random.Random(0)
+
+    def word():
+        return ''.join(rnd.choice(string.ascii_lowercase)
+                       for _ in range(rnd.randint(4, 9)))
+
+    glossary = {word(): word() for _ in range(n)}
+    terms = list(glossary)
+    text = ' '.join(rnd.choice(terms).capitalize() if rnd.random() < 0.3
+                    else word() for _ in range(size))
+
+    def chained():
+        r = text
+        for term, new in glossary.items():
+            r = re.sub(term, lambda m: _matchcase(m.group(), new), r,
+                       flags=re.IGNORECASE)
+        return r
+
+    def alternation():
+        regex = re.compile('|'.join(map(re.escape, sorted(
+            glossary, key=len, reverse=True))), re.IGNORECASE)
+        return regex.sub(lambda m: _matchcase(
+            m.group(), glossary[m.group().lower()]), text)
+
+    for name, func in (('chained re.sub', chained),
+                       ('alternation', alternation),
+                       ('Aho-Corasick', lambda: GlossaryReplacer(
+                           glossary).sub(text)[0])):
+        start = time.perf_counter()
+        func()
+        print('{:15s} {:.3f}s'.format(name, time.perf_counter() - start))
+
 
 # ====================================================
 # 0207 longest vs shortest match pattern
@@ -502,4 +1163,11 @@ def test_022001():
 
 
 if __name__ == '__main__':
+    import doctest
+    import sys
+    doctest.testmod(verbose=True)
+
     call_funcs(vars(), lambda s: s.startswith('test_'))
+    # benchmarks are slow : run only w/ 'python ch02.py bench'
+    if 'bench' in sys.argv[1:]:
+        call_funcs(vars(), lambda s: s.startswith('bench_'))
@@ -1,4 +1,5 @@
 import inspect
+import time
 
 
 def call_funcs(vars, predicate):
@@ -10,6 +11,41 @@ def call_funcs(vars, predicate):
         func()
 
 
+def _measure(func, args, kwargs):
+    import resource
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result, elapsed, after - before
+
+
+def measure_in_child(func, *args, **kwargs):
+    """run func in a fresh process : (result, seconds, peak rss growth KB)
+
+    func, args and result must be picklable (module level functions)
+    ru_maxrss can't be reset, so each measurement gets its own process
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=1) as ex:
+        return ex.submit(_measure, func, args, kwargs).result()
+
+
+def measure_alloc(func, *args, **kwargs):
+    """run func under tracemalloc : (result, seconds, peak bytes)"""
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
 def test_sample():
     print("i'm {}".format(inspect.stack()[0][3]))
 